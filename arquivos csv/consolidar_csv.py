@@ -1,6 +1,15 @@
 from fastapi import FastAPI, UploadFile, File
+from fastapi.responses import StreamingResponse
 import pandas as pd
 from io import BytesIO
+from typing import List
+import codecs
+import csv
+import glob
+import io
+import os
+import re
+import sys
 
 app = FastAPI()
 
@@ -30,3 +39,218 @@ async def upload_csv(file: UploadFile = File(...)):
     
     # Retornar o arquivo processado
     return {"message": "Arquivo processado com sucesso.", "csv_processado": csv_processado.decode('utf-8')}
+
+
+# Consolidação dos CSVs do JCR exportados por categoria (modificado_* JCR 2023.csv)
+#
+# Cada arquivo de categoria repete o periódico uma vez por categoria. Os
+# arquivos são lidos em fluxo, linha a linha, e cada periódico é guardado uma
+# única vez, identificado pelo ISSN/eISSN normalizado; das linhas repetidas
+# só se acumulam a categoria e o quartil. A memória cresce com o número de
+# periódicos únicos, não com o número de linhas lidas. O resultado é a tabela
+# no formato do 'JCR tabelado.xlsx', com um periódico por linha; o 'JIF
+# Quartile' do periódico é o melhor quartil entre as suas categorias, a mesma
+# regra que o analisador (construir_indice_jcr, em indices.py) aplica a uma
+# tabela com uma linha por categoria.
+#
+# Uso:
+#     python consolidar_csv.py [pasta dos CSVs] [arquivo de saída .xlsx ou .csv]
+
+PADRAO_CATEGORIAS = 'modificado_*.csv'
+ARQUIVO_SAIDA = 'JCR tabelado.xlsx'
+SEPARADOR_CATEGORIAS = '; '
+VAZIOS = ('', 'N/A')
+
+# Colunas dos arquivos de categoria (o ano das colunas JIF/JCI vem do nome do arquivo)
+COLUNAS_CATEGORIA = ['Journal name', 'JCR Abbreviation', 'Publisher', 'ISSN', 'eISSN', 'Category', 'Edition',
+                     'Total Citations', '{ano} JIF', 'JIF Quartile', '{ano} JCI', '% of OA Gold']
+(NOME, _, _, ISSN, EISSN, CATEGORIA, _, CITACOES, JIF, QUARTIL, JCI, OA_GOLD) = range(len(COLUNAS_CATEGORIA))
+COLUNA_QUARTIS = 'Quartis por categoria'
+QUARTIS = ('Q1', 'Q2', 'Q3', 'Q4')  # Do melhor para o pior
+
+
+def ano_do_arquivo(caminho: str) -> int:
+    """Extrai o ano do nome do arquivo (ex.: 'modificado_CC JCR 2023.csv' -> 2023)."""
+    encontrado = re.search(r'(\d{4})', os.path.basename(caminho))
+    if not encontrado:
+        raise ValueError(f"Ano não encontrado no nome do arquivo {os.path.basename(caminho)}.")
+    return int(encontrado.group(1))
+
+def normalizar_issn(issn: str) -> str:
+    """Normaliza o ISSN para a comparação (sem traço e sem espaços); vazio ou 'N/A' viram ''."""
+    issn = issn.strip()
+    return '' if issn in VAZIOS else issn.replace('-', '').upper()
+
+def restaurar_primeira_linha(campos: list) -> list:
+    """Desfaz o cabeçalho gerado pelo pandas a partir da primeira linha de dados.
+
+    A primeira linha dos arquivos de categoria foi gravada como cabeçalho: os
+    valores repetidos ganharam o sufixo '.1' (ex.: eISSN igual ao ISSN) e a
+    coluna vazia do fim virou 'Unnamed: 12'.
+    """
+    restaurados = []
+    for campo in campos:
+        if campo.startswith('Unnamed:'):
+            campo = ''
+        else:
+            repetido = re.fullmatch(r'(.*)\.\d+', campo)
+            if repetido and repetido.group(1) in restaurados:
+                campo = repetido.group(1)
+        restaurados.append(campo)
+    return restaurados
+
+def ler_linhas_categoria(fluxo_texto):
+    """Lê em fluxo as linhas de um arquivo de categoria (já aberto em modo texto)."""
+    for numero, campos in enumerate(csv.reader(fluxo_texto)):
+        if not campos or not any(campo.strip() for campo in campos):
+            continue
+        if numero == 0:
+            if campos[0] == COLUNAS_CATEGORIA[0]:
+                continue  # Arquivo com cabeçalho de verdade
+            if campos[-1].startswith('Unnamed:'):
+                campos = restaurar_primeira_linha(campos)
+        yield (campos + [''] * len(COLUNAS_CATEGORIA))[:len(COLUNAS_CATEGORIA)]
+
+def converter_numero(valor: str, percentual: bool = False):
+    """Converte '9,198', '37.3' ou '72.41%' em número; valores como '<0.1' ficam como texto, com vírgula ('<0,1')."""
+    valor = valor.strip()
+    if valor in VAZIOS:
+        return None
+    try:
+        if percentual and valor.endswith('%'):
+            return round(float(valor[:-1]) / 100, 6)
+        numero = float(valor.replace(',', ''))
+        return int(numero) if '.' not in valor else numero
+    except ValueError:
+        return valor.replace('.', ',')
+
+def melhor_quartil(quartis: list) -> str:
+    """Melhor quartil (Q1 a Q4) entre as categorias do periódico; o primeiro valor informado se nenhum for Q1-Q4."""
+    validos = [quartil for quartil in quartis if quartil in QUARTIS]
+    if validos:
+        return min(validos, key=QUARTIS.index)
+    return next((quartil for quartil in quartis if quartil), None)
+
+
+class ConsolidadorJCR:
+    """Periódicos únicos do JCR, identificados pelo ISSN/eISSN normalizado."""
+
+    def __init__(self):
+        self.periodicos = []  # [campos da primeira linha, categorias, quartil de cada categoria]
+        self._por_chave = {}  # ISSN/eISSN normalizado (ou nome, sem ISSN) -> posição em self.periodicos
+        self.linhas_lidas = 0
+
+    def _chaves(self, campos: list) -> list:
+        chaves = [chave for chave in (normalizar_issn(campos[ISSN]), normalizar_issn(campos[EISSN])) if chave]
+        return chaves or ['nome:' + campos[NOME].strip().lower()]
+
+    def adicionar(self, campos: list):
+        """Acrescenta uma linha: novo periódico ou nova categoria de um periódico já visto."""
+        self.linhas_lidas += 1
+        chaves = self._chaves(campos)
+        posicao = next((self._por_chave[chave] for chave in chaves if chave in self._por_chave), None)
+        if posicao is None:
+            posicao = len(self.periodicos)
+            self.periodicos.append([campos, [], []])
+        for chave in chaves:
+            self._por_chave.setdefault(chave, posicao)
+
+        _, categorias, quartis = self.periodicos[posicao]
+        categoria = campos[CATEGORIA].strip()
+        if categoria and categoria not in categorias:
+            categorias.append(categoria)
+            quartis.append(campos[QUARTIL].strip())
+
+    def adicionar_arquivo(self, fluxo_texto):
+        for campos in ler_linhas_categoria(fluxo_texto):
+            self.adicionar(campos)
+
+    def colunas(self, ano: int) -> list:
+        return [coluna.format(ano=ano) for coluna in COLUNAS_CATEGORIA] + [COLUNA_QUARTIS]
+
+    def linhas(self):
+        """Gera a tabela consolidada: um periódico por linha, com as categorias reunidas."""
+        for campos, categorias, quartis in self.periodicos:
+            linha = [campo.strip() or None for campo in campos]
+            linha[ISSN] = campos[ISSN].strip() if normalizar_issn(campos[ISSN]) else None
+            linha[EISSN] = campos[EISSN].strip() if normalizar_issn(campos[EISSN]) else None
+            linha[CATEGORIA] = SEPARADOR_CATEGORIAS.join(categorias)
+            linha[CITACOES] = converter_numero(campos[CITACOES])
+            linha[JIF] = converter_numero(campos[JIF])
+            linha[JCI] = converter_numero(campos[JCI])
+            linha[OA_GOLD] = converter_numero(campos[OA_GOLD], percentual=True)
+            linha[QUARTIL] = melhor_quartil(quartis)
+            yield linha + [SEPARADOR_CATEGORIAS.join(f"{categoria}: {quartil}" for categoria, quartil in zip(categorias, quartis))]
+
+
+def consolidar_arquivos(caminhos: list) -> tuple:
+    """Consolida os arquivos de categoria de um mesmo ano. Retorna (consolidador, ano)."""
+    anos = {ano_do_arquivo(caminho) for caminho in caminhos}
+    if len(anos) != 1:
+        raise ValueError(f"Os arquivos devem ser de um único ano do JCR (encontrados: {sorted(anos)}).")
+    consolidador = ConsolidadorJCR()
+    for caminho in caminhos:
+        with open(caminho, encoding='utf-8-sig', newline='') as fluxo:
+            consolidador.adicionar_arquivo(fluxo)
+    return consolidador, anos.pop()
+
+def gravar_xlsx(consolidador: ConsolidadorJCR, ano: int, destino):
+    """Grava a tabela consolidada em XLSX por uma planilha somente escrita (sem montar as células em memória)."""
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    planilha = workbook.create_sheet('JCR')
+    planilha.append(consolidador.colunas(ano))
+    for linha in consolidador.linhas():
+        planilha.append(linha)
+    workbook.save(destino)
+
+def gerar_csv(consolidador: ConsolidadorJCR, ano: int):
+    """Gera a tabela consolidada em CSV, linha a linha."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator='\n')
+    escritor.writerow(consolidador.colunas(ano))
+    yield buffer.getvalue()
+    for linha in consolidador.linhas():
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerow(['' if valor is None else valor for valor in linha])
+        yield buffer.getvalue()
+
+# Endpoint para consolidar os CSVs de categoria enviados em um único JCR tabelado (CSV)
+@app.post("/upload/consolidar_jcr/")
+async def consolidar_jcr(files: List[UploadFile] = File(...)):
+    try:
+        anos = {ano_do_arquivo(file.filename) for file in files}
+    except ValueError as e:
+        return {"message": str(e)}
+    if len(anos) != 1:
+        return {"message": f"Os arquivos devem ser de um único ano do JCR (encontrados: {sorted(anos)})."}
+
+    # Cada arquivo é decodificado e lido em fluxo, sem carregar o CSV inteiro
+    consolidador = ConsolidadorJCR()
+    for file in files:
+        file.file.seek(0)
+        consolidador.adicionar_arquivo(codecs.getreader('utf-8-sig')(file.file))
+
+    return StreamingResponse(
+        gerar_csv(consolidador, anos.pop()),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=JCR_tabelado.csv"}
+    )
+
+
+if __name__ == "__main__":
+    pasta = sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.path.abspath(__file__))
+    destino = sys.argv[2] if len(sys.argv) > 2 else os.path.join(pasta, ARQUIVO_SAIDA)
+    caminhos = sorted(glob.glob(os.path.join(glob.escape(pasta), PADRAO_CATEGORIAS)))
+    if not caminhos:
+        sys.exit(f"Nenhum arquivo '{PADRAO_CATEGORIAS}' encontrado em {pasta}.")
+
+    consolidador, ano = consolidar_arquivos(caminhos)
+    if destino.endswith('.csv'):
+        with open(destino, 'w', encoding='utf-8', newline='') as saida:
+            saida.writelines(gerar_csv(consolidador, ano))
+    else:
+        gravar_xlsx(consolidador, ano, destino)
+    print(f"{consolidador.linhas_lidas} linhas lidas de {len(caminhos)} arquivos; "
+          f"{len(consolidador.periodicos)} periódicos gravados em {destino}.")
@@ -0,0 +1,83 @@
+"""Compara a serialização antiga (to_dict + sanitize_float_values + codificador do FastAPI)
+com a serialização direta das tabelas em JSON.
+
+Uso:
+    python benchmark_serializacao.py caminho/do/curriculo.xml [repeticoes]
+
+Mede o tempo médio e o pico de memória alocada de cada caminho, a partir dos
+artigos já enriquecidos (a extração e a classificação são iguais nos dois).
+"""
+import json
+import math
+import sys
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+
+from main import calcular_pontuacao_qualis, enriquecer_artigos, limpar_artigos, processar_xml
+from referencias import carregar_referencias
+from serializacao import montar_objeto_json, tabela_para_json
+
+
+def sanitize_float_values(data):
+    """Versão anterior: substitui valores fora do intervalo (NaN, inf, -inf) por None, recursivamente."""
+    if isinstance(data, dict):
+        return {k: sanitize_float_values(v) for k, v in data.items()}
+    elif isinstance(data, list):
+        return [sanitize_float_values(item) for item in data]
+    elif isinstance(data, float):
+        if math.isnan(data) or math.isinf(data):
+            return None
+    return data
+
+def serializar_antigo(nome_pessoa, artigos_df):
+    pontuacao_qualis = sanitize_float_values(calcular_pontuacao_qualis(artigos_df).to_dict(orient="records"))
+    artigos_df = artigos_df.replace([float("inf"), -float("inf")], float("nan")).fillna(0)
+    resultado = {
+        "nomePessoa": nome_pessoa,
+        "artigos": artigos_df.to_dict(orient="records"),
+        "pontuacaoQualis": pontuacao_qualis
+    }
+    return json.dumps(jsonable_encoder(resultado), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def serializar_novo(nome_pessoa, artigos_df):
+    return montar_objeto_json({
+        "nomePessoa": nome_pessoa,
+        "artigos": tabela_para_json(limpar_artigos(artigos_df)),
+        "pontuacaoQualis": tabela_para_json(calcular_pontuacao_qualis(artigos_df))
+    })
+
+def medir(serializar, nome_pessoa, artigos_df, repeticoes):
+    """Retorna (tempo médio em ms, pico de memória em KiB, tamanho da resposta em bytes)."""
+    serializar(nome_pessoa, artigos_df)  # Aquecimento
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resposta = serializar(nome_pessoa, artigos_df)
+    tempo = (time.perf_counter() - inicio) / repeticoes * 1000
+
+    tracemalloc.start()
+    serializar(nome_pessoa, artigos_df)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tempo, pico / 1024, len(resposta)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    referencias = carregar_referencias()
+    with open(sys.argv[1], "rb") as xml_fonte:
+        nome_pessoa, artigos_df = processar_xml(xml_fonte)
+    artigos_df = enriquecer_artigos(artigos_df, referencias)
+    print(f"{len(artigos_df)} artigos, {repeticoes} repetições")
+
+    antigo = serializar_antigo(nome_pessoa, artigos_df)
+    novo = serializar_novo(nome_pessoa, artigos_df)
+    print(f"Mesmos artigos nas duas respostas: {json.loads(antigo)['artigos'] == json.loads(novo)['artigos']}")
+
+    for nome, serializar in (("antigo", serializar_antigo), ("novo", serializar_novo)):
+        tempo, pico, tamanho = medir(serializar, nome_pessoa, artigos_df, repeticoes)
+        print(f"{nome:>6}: {tempo:7.2f} ms | pico de memória {pico:8.1f} KiB | {tamanho} bytes")
@@ -0,0 +1,107 @@
+"""Cache de resultados de análise endereçado pelo conteúdo do currículo.
+
+A chave combina o hash do XML enviado com a versão dos dados de referência,
+de modo que qualquer mudança no Qualis, JCR, SJR ou no cadastro de
+docentes/discentes invalida automaticamente os resultados anteriores.
+
+Os resultados são guardados já serializados em JSON (bytes), tanto na
+memória quanto no disco, e voltam ao cliente sem nova codificação. Com o
+nível em disco, `obter` e `guardar` fazem E/S e devem rodar fora do event
+loop (asyncio.to_thread).
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+def chave_resultado(xml_bytes: bytes, versao_referencias: str) -> str:
+    """Gera a chave do cache a partir do conteúdo do XML e da versão das referências."""
+    return hashlib.sha256(xml_bytes + b"\0" + versao_referencias.encode()).hexdigest()
+
+
+class CacheResultados:
+    """Cache LRU de resultados: primeiro em memória e, opcionalmente, em disco."""
+
+    def __init__(self, capacidade: int = 128, pasta: str = None, capacidade_disco: int = 1024):
+        self.capacidade = capacidade
+        self.pasta = pasta
+        self.capacidade_disco = capacidade_disco
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+    def obter(self, chave: str):
+        """Retorna o resultado guardado para a chave, ou None."""
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                return self._memoria[chave]
+
+        resultado = self._ler_disco(chave)
+        if resultado is not None:
+            self._guardar_memoria(chave, resultado)
+        return resultado
+
+    def guardar(self, chave: str, resultado: bytes):
+        """Guarda o resultado na memória e, se configurado, no disco."""
+        self._guardar_memoria(chave, resultado)
+        self._gravar_disco(chave, resultado)
+
+    def limpar(self):
+        """Esvazia o nível em memória (o disco é renovado pelas chaves versionadas)."""
+        with self._lock:
+            self._memoria.clear()
+
+    def _guardar_memoria(self, chave, resultado):
+        with self._lock:
+            self._memoria[chave] = resultado
+            self._memoria.move_to_end(chave)
+            while len(self._memoria) > self.capacidade:
+                self._memoria.popitem(last=False)
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, f"{chave}.json")
+
+    def _ler_disco(self, chave):
+        if not self.pasta:
+            return None
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, "rb") as f:
+                resultado = f.read()
+            os.utime(caminho)  # Marca o uso recente para a remoção LRU
+            return resultado
+        except OSError:
+            return None
+
+    def _gravar_disco(self, chave, resultado):
+        if not self.pasta:
+            return
+        try:
+            temporario = f"{self._caminho(chave)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporario, "wb") as f:
+                f.write(resultado)
+            os.replace(temporario, self._caminho(chave))
+            self._podar_disco()
+        except OSError as e:
+            print(f"Erro ao gravar o cache em disco: {e}")
+
+    def _podar_disco(self):
+        """Remove os arquivos usados há mais tempo quando o disco passa da capacidade."""
+        arquivos = [os.path.join(self.pasta, f) for f in os.listdir(self.pasta) if f.endswith(".json")]
+        if len(arquivos) <= self.capacidade_disco:
+            return
+        usos = []
+        for caminho in arquivos:
+            try:
+                usos.append((os.path.getmtime(caminho), caminho))
+            except OSError:
+                pass  # Removido por outra gravação em paralelo
+        usos.sort()
+        for _, caminho in usos[:len(usos) - self.capacidade_disco]:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
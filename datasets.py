@@ -0,0 +1,115 @@
+"""Planilhas de referência avulsas (Qualis, JCR ou SJR) registradas uma única vez.
+
+O arquivo enviado é identificado pelo hash do conteúdo, lido e indexado uma
+só vez; as consultas seguintes usam apenas o identificador retornado. Os
+datasets ficam em um LRU limitado pelo tamanho dos índices em memória e os
+menos usados são descartados automaticamente.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from io import BytesIO
+
+import pandas as pd
+
+from indices import (
+    MetricasPorAno, classificar_qualis, coluna_jif, construir_indice_jcr, construir_indice_qualis, construir_indice_sjr,
+    consultar_jcr, consultar_sjr, normalizar_issns_consulta
+)
+from referencias import ano_do_arquivo, carregar_jcr, carregar_qualis, carregar_sjr
+
+TIPOS = ('qualis', 'jcr', 'sjr')
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Planilha de referência registrada e já indexada."""
+    id: str
+    tipo: str
+    arquivo: str
+    tamanho: int  # Memória ocupada pelo índice, em bytes
+    indice: object  # pd.Series (Qualis) ou MetricasPorAno (JCR e SJR)
+
+    def resumo(self) -> dict:
+        return {"datasetId": self.id, "tipo": self.tipo, "arquivo": self.arquivo, "tamanho": self.tamanho}
+
+
+def id_dataset(tipo: str, contents: bytes, ano: int = None) -> str:
+    """Identificador do dataset: hash do tipo, do ano informado (se houver) e do conteúdo do arquivo."""
+    return hashlib.sha256(f"{tipo}\0{ano or ''}\0".encode() + contents).hexdigest()
+
+def compilar_dataset(tipo: str, nome_arquivo: str, contents: bytes, ano: int = None):
+    """Lê e indexa a planilha enviada. Lança ValueError se ela não puder ser usada."""
+    if tipo == 'qualis':
+        return construir_indice_qualis(carregar_qualis(BytesIO(contents)))
+    if tipo == 'jcr':
+        jcr_df = carregar_jcr(BytesIO(contents))
+        _, ano_jcr = coluna_jif(jcr_df)
+        return MetricasPorAno({ano_jcr: construir_indice_jcr(jcr_df)})
+    if ano is None:
+        try:
+            ano = ano_do_arquivo(nome_arquivo)
+        except ValueError:
+            raise ValueError("Informe o ano do SJR (campo 'ano' ou no nome do arquivo, ex.: 'scimagojr 2023.csv').")
+    return MetricasPorAno({ano: construir_indice_sjr(carregar_sjr(BytesIO(contents)))})
+
+def tamanho_indice(indice) -> int:
+    """Memória ocupada por um índice compilado, em bytes."""
+    tabela = indice.tabela if isinstance(indice, MetricasPorAno) else indice
+    uso = tabela.memory_usage(deep=True)  # Series: inteiro; DataFrame: uso por coluna
+    return int(uso.sum() if isinstance(uso, pd.Series) else uso)
+
+def classificar_issns_dataset(dataset: Dataset, issns: list) -> pd.DataFrame:
+    """Classifica uma lista de ISSNs com o índice do dataset."""
+    chaves = normalizar_issns_consulta(issns)
+    if dataset.tipo == 'qualis':
+        resultado = classificar_qualis(chaves, dataset.indice).rename('Qualis').to_frame()
+    elif dataset.tipo == 'jcr':
+        resultado = consultar_jcr(chaves, None, dataset.indice)
+    else:
+        resultado = consultar_sjr(chaves, None, dataset.indice)
+    return pd.concat([pd.DataFrame({'ISSN': pd.Series(issns, dtype=object)}), resultado], axis=1)
+
+
+class RegistroDatasets:
+    """LRU de datasets limitado pela memória total dos índices."""
+
+    def __init__(self, capacidade_bytes: int):
+        self.capacidade_bytes = capacidade_bytes
+        self._datasets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def registrar(self, tipo: str, nome_arquivo: str, contents: bytes, ano: int = None):
+        """Registra a planilha (ou reaproveita a já registrada com o mesmo conteúdo). Retorna (dataset, novo)."""
+        dataset_id = id_dataset(tipo, contents, ano)
+        existente = self.obter(dataset_id)
+        if existente is not None:
+            return existente, False
+
+        indice = compilar_dataset(tipo, nome_arquivo, contents, ano)
+        dataset = Dataset(id=dataset_id, tipo=tipo, arquivo=nome_arquivo, tamanho=tamanho_indice(indice), indice=indice)
+        if dataset.tamanho > self.capacidade_bytes:
+            raise ValueError("O índice da planilha excede a memória reservada para datasets.")
+        with self._lock:
+            self._datasets[dataset_id] = dataset
+            self._datasets.move_to_end(dataset_id)
+            while sum(d.tamanho for d in self._datasets.values()) > self.capacidade_bytes:
+                self._datasets.popitem(last=False)
+        return dataset, True
+
+    def obter(self, dataset_id: str):
+        """Retorna o dataset (marcando o uso recente), ou None se ele não existir ou tiver sido descartado."""
+        with self._lock:
+            dataset = self._datasets.get(dataset_id)
+            if dataset is not None:
+                self._datasets.move_to_end(dataset_id)
+            return dataset
+
+    def remover(self, dataset_id: str) -> bool:
+        with self._lock:
+            return self._datasets.pop(dataset_id, None) is not None
+
+    def listar(self) -> list:
+        with self._lock:
+            return [dataset.resumo() for dataset in self._datasets.values()]
@@ -0,0 +1,214 @@
+"""Exportação de um resultado já analisado para CSV e XLSX.
+
+As linhas são geradas uma a uma a partir do resultado guardado (de um
+currículo ou de um lote): o CSV é enviado à medida que cada linha fica
+pronta, e o XLSX é escrito por uma planilha em modo somente escrita, que
+não mantém as células em memória.
+
+O JSON guardado não é decodificado por inteiro: os campos do resultado são
+apenas localizados, e cada artigo (ou registro da pontuação) é decodificado
+quando a sua linha é gerada.
+"""
+import csv
+import io
+import json
+import re
+from itertools import chain
+from urllib.parse import quote
+
+import unidecode
+from openpyxl import Workbook
+
+# Mesmo formato do /generate-csv/: ';' entre colunas, vírgula decimal e 3 casas
+SEPARADOR_CSV = ';'
+FORMATO_DECIMAL = '%.3f'
+TABELAS = ('artigos', 'pontuacao')
+TAMANHO_BLOCO_ARQUIVO = 64 * 1024
+
+
+# Leitura do JSON guardado sob demanda
+DECODIFICADOR_JSON = json.JSONDecoder()
+ESPACOS_JSON = re.compile(r'[ \t\n\r]*')
+
+def pular_espacos(texto: str, posicao: int) -> int:
+    """Posição do primeiro caractere que não é espaço a partir de `posicao`."""
+    return ESPACOS_JSON.match(texto, posicao).end()
+
+def itens_da_lista(texto: str, posicao: int, ler):
+    """Gera os itens da lista JSON que começa em `posicao`, cada um lido por `ler(texto, posicao) -> (item, fim)`.
+
+    Retorna a posição logo após a lista.
+    """
+    posicao = pular_espacos(texto, posicao + 1)
+    if texto[posicao] == ']':
+        return posicao + 1
+    while True:
+        item, posicao = ler(texto, posicao)
+        yield item
+        posicao = pular_espacos(texto, posicao)
+        if texto[posicao] == ']':
+            return posicao + 1
+        posicao = pular_espacos(texto, posicao + 1)
+
+def campos_do_objeto(texto: str, posicao: int, ler):
+    """Gera os pares (chave, valor) do objeto JSON que começa em `posicao`, cada valor lido por `ler(texto, posicao) -> (valor, fim)`.
+
+    Retorna a posição logo após o objeto.
+    """
+    posicao = pular_espacos(texto, posicao + 1)
+    if texto[posicao] == '}':
+        return posicao + 1
+    while True:
+        chave, posicao = DECODIFICADOR_JSON.raw_decode(texto, posicao)
+        posicao = pular_espacos(texto, pular_espacos(texto, posicao) + 1)  # Depois do ':'
+        valor, posicao = ler(texto, posicao)
+        yield chave, valor
+        posicao = pular_espacos(texto, posicao)
+        if texto[posicao] == '}':
+            return posicao + 1
+        posicao = pular_espacos(texto, posicao + 1)
+
+def coletar(gerador):
+    """Consome um gerador e retorna os itens gerados e o valor que ele retornou."""
+    itens = []
+    while True:
+        try:
+            itens.append(next(gerador))
+        except StopIteration as fim:
+            return itens, fim.value
+
+def pular(texto: str, posicao: int):
+    """Decodifica e descarta um valor JSON. Retorna (None, fim)."""
+    return None, DECODIFICADOR_JSON.raw_decode(texto, posicao)[1]
+
+def localizar(texto: str, posicao: int):
+    """Lê um valor JSON apenas como a sua posição; as listas são puladas item a item, sem serem montadas."""
+    if texto[posicao] == '[':
+        _, fim = coletar(itens_da_lista(texto, posicao, pular))
+    else:
+        _, fim = pular(texto, posicao)
+    return posicao, fim
+
+def ler_objeto(texto: str, posicao: int):
+    """Lê um objeto JSON como ObjetoGuardado (só a posição de cada campo). Retorna (objeto, fim)."""
+    campos, fim = coletar(campos_do_objeto(texto, posicao, localizar))
+    return ObjetoGuardado(texto, dict(campos)), fim
+
+
+class ObjetoGuardado:
+    """Objeto JSON de um resultado guardado, com os valores decodificados só quando lidos."""
+
+    def __init__(self, texto: str, posicoes: dict):
+        self.texto = texto
+        self.posicoes = posicoes  # Campo -> posição do valor no texto
+
+    def __contains__(self, chave):
+        return chave in self.posicoes
+
+    def get(self, chave, padrao=None):
+        """Decodifica o valor inteiro de um campo (para campos pequenos, como o nome)."""
+        if chave not in self.posicoes:
+            return padrao
+        return DECODIFICADOR_JSON.raw_decode(self.texto, self.posicoes[chave])[0]
+
+    def itens(self, chave):
+        """Gera, decodificando um por vez, os itens de um campo que é uma lista (nenhum se não for)."""
+        posicao = self.posicoes.get(chave)
+        if posicao is None or self.texto[posicao] != '[':
+            return iter(())
+        return itens_da_lista(self.texto, posicao, DECODIFICADOR_JSON.raw_decode)
+
+    def objetos(self, chave):
+        """Gera os objetos de um campo que é uma lista de objetos, também como ObjetoGuardado."""
+        posicao = self.posicoes.get(chave)
+        if posicao is None or self.texto[posicao] != '[':
+            return iter(())
+        return itens_da_lista(self.texto, posicao, ler_objeto)
+
+
+def ler_resultado(resultado_json: bytes):
+    """Localiza os campos de um resultado guardado. Retorna None se ele não tiver artigos para exportar."""
+    texto = resultado_json.decode('utf-8')
+    posicao = pular_espacos(texto, 0)
+    if not texto.startswith('{', posicao):
+        return None
+    resultado, _ = ler_objeto(texto, posicao)
+    return resultado if "artigos" in resultado or "curriculos" in resultado else None
+
+def tabela_registros(pares):
+    """Retorna (colunas, linhas) de pares (valores iniciais da linha, registro) lidos um a um.
+
+    As colunas vêm do primeiro registro.
+    """
+    primeiro = next(pares, None)
+    if primeiro is None:
+        return [], iter(())
+    colunas = list(primeiro[1])
+    return colunas, ([*inicio, *(registro.get(coluna) for coluna in colunas)] for inicio, registro in chain([primeiro], pares))
+
+def tabela_artigos(resultado: ObjetoGuardado):
+    """Retorna (colunas, linhas) dos artigos; no lote, cada linha começa pelo arquivo e pelo nome da pessoa."""
+    if "curriculos" not in resultado:
+        return tabela_registros(((), artigo) for artigo in resultado.itens("artigos"))
+
+    artigos = (
+        ((curriculo.get("arquivo"), curriculo.get("nomePessoa")), artigo)
+        for curriculo in resultado.objetos("curriculos") for artigo in curriculo.itens("artigos")
+    )
+    colunas, linhas = tabela_registros(artigos)
+    return ['Arquivo', 'Nome'] + colunas, linhas
+
+def tabela_pontuacao(resultado: ObjetoGuardado):
+    """Retorna (colunas, linhas) da pontuação Qualis (a do programa, no lote)."""
+    return tabela_registros(((), registro) for registro in resultado.itens("pontuacaoQualis"))
+
+def formatar_celula_csv(valor):
+    """Formata um valor como o pandas.to_csv do /generate-csv/ (vazio para null, vírgula decimal)."""
+    if valor is None:
+        return ''
+    if isinstance(valor, float):
+        return (FORMATO_DECIMAL % valor).replace('.', ',')
+    return valor
+
+def gerar_csv(colunas, linhas):
+    """Gera o CSV linha a linha."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=SEPARADOR_CSV, lineterminator='\n')
+    escritor.writerow(colunas)
+    yield buffer.getvalue().encode('utf-8')
+    for linha in linhas:
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerow([formatar_celula_csv(valor) for valor in linha])
+        yield buffer.getvalue().encode('utf-8')
+
+def gravar_xlsx(resultado: ObjetoGuardado, arquivo):
+    """Grava o XLSX (abas Artigos e Pontuação Qualis) no arquivo informado, sem montar as planilhas em memória."""
+    workbook = Workbook(write_only=True)
+    for titulo, tabela in (("Artigos", tabela_artigos), ("Pontuação Qualis", tabela_pontuacao)):
+        planilha = workbook.create_sheet(titulo)
+        colunas, linhas = tabela(resultado)
+        planilha.append(colunas)
+        for linha in linhas:
+            planilha.append(linha)
+    workbook.save(arquivo)
+
+def ler_em_blocos(arquivo):
+    """Lê um arquivo aberto em blocos e o fecha ao final (o arquivo temporário é apagado)."""
+    try:
+        arquivo.seek(0)
+        while bloco := arquivo.read(TAMANHO_BLOCO_ARQUIVO):
+            yield bloco
+    finally:
+        arquivo.close()
+
+def nome_base_exportacao(resultado: ObjetoGuardado, resultado_id: str) -> str:
+    """Nome do arquivo exportado, sem extensão."""
+    if "curriculos" in resultado:
+        return f"lote_{resultado_id[:8]}"
+    return f"{resultado.get('nomePessoa') or resultado_id[:8]}_curriculo"
+
+def cabecalho_download(nome_arquivo: str) -> dict:
+    """Cabeçalho Content-Disposition com nome ASCII de reserva e o nome original em UTF-8."""
+    reserva = unidecode.unidecode(nome_arquivo).replace('"', '')
+    return {"Content-Disposition": f"attachment; filename=\"{reserva}\"; filename*=UTF-8''{quote(nome_arquivo)}"}
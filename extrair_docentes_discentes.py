@@ -1,35 +1,15 @@
-from fastapi import FastAPI, File, UploadFile
+from fastapi import FastAPI, File, UploadFile, Query
 import pandas as pd
 import json
 import os
+from io import BytesIO
+from participantes import ARQUIVO_CADASTRO, IndiceParticipantes, formatar_nome_autor, salvar_cadastro
+from referencias import ARQUIVO_DOCENTES_DISCENTES, PASTA_DADOS, hash_arquivo
 
-app = FastAPI()
-
-# Lista de preposições a serem ignoradas
-preposicoes = {"de", "do", "da", "dos", "das"}
-
-def formatar_nome_autor(nome: str) -> dict:
-    """
-    Formata o nome do autor em múltiplos estilos: APA, ABNT e customizado.
-    Exemplo: "Antonio Acacio de Melo Neto" -> "Melo Neto, A. A."
-    """
-    partes = nome.split()
-    nome_principal = [parte for parte in partes[:-1] if parte.lower() not in preposicoes]  # Ignorar preposições
-    sobrenome = partes[-1]  # Última parte é o sobrenome ou sufixo importante (Neto, Filho)
-
-    # Verificar se há sufixos como "Neto", "Filho" que devem ser mantidos juntos
-    if len(partes) > 1 and partes[-2].lower() not in preposicoes:
-        sobrenome = f"{partes[-2]} {sobrenome}"
+# Pasta onde o cadastro compilado (e, se pedida, a planilha) é gravado: a pasta de dados do serviço de análise
+PASTA_CADASTRO = os.getenv("PASTA_CADASTRO", PASTA_DADOS)
 
-    # Construir as iniciais dos nomes
-    iniciais = " ".join([p[0].upper() + "." for p in nome_principal])
-
-    # Formatar nos diferentes estilos
-    apa = f"{sobrenome}, {iniciais}"
-    abnt = f"{sobrenome.upper()}, {' '.join(nome_principal).title()}"
-    custom = f"{iniciais} {sobrenome.title()}"
-
-    return {"APA": apa, "ABNT": abnt, "Custom": custom}
+app = FastAPI()
 
 def salvar_em_arquivo_excel(dados, caminho):
     # Converter a lista de dicionários em DataFrame
@@ -42,47 +22,48 @@ def salvar_em_arquivo_excel(dados, caminho):
     df.to_excel(caminho_completo, index=False, engine='openpyxl')
     return caminho_completo
 
+def montar_cadastro(docentes_xls: pd.DataFrame, discentes_nomes: list) -> pd.DataFrame:
+    """Monta a tabela de docentes (DP/DC) e discentes (DISC) com as variantes de nome de cada um."""
+    docentes = docentes_xls[['NOME', 'CATEGORIA']].dropna()
+    nomes = docentes['NOME'].tolist() + list(discentes_nomes)
+    categorias = ['DP' if categoria.lower() == 'permanente' else 'DC' for categoria in docentes['CATEGORIA']]
+    categorias += ['DISC'] * len(discentes_nomes)
+    formatados = [formatar_nome_autor(nome) for nome in nomes]
+    return pd.DataFrame({
+        "Nome Completo": nomes,
+        "Categoria": categorias,
+        "APA": [nome["APA"] for nome in formatados],
+        "ABNT": [nome["ABNT"] for nome in formatados],
+        "Custom": [nome["Custom"] for nome in formatados],
+    })
+
 @app.post("/upload/todos/")
-async def upload_todos(docentes_file: UploadFile = File(...), discentes_file: UploadFile = File(...)):
+async def upload_todos(
+    docentes_file: UploadFile = File(...),
+    discentes_file: UploadFile = File(...),
+    gerar_planilha: bool = Query(False, description="Grava também o docentes_discentes_formatados.xlsx")
+):
     # Processar docentes
     docentes_contents = await docentes_file.read()
-    docentes_xls = pd.read_excel(docentes_contents, engine='openpyxl')
+    docentes_xls = pd.read_excel(BytesIO(docentes_contents), engine='openpyxl')
     
     # Processar discentes
     discentes_contents = await discentes_file.read()
     discentes_json = json.loads(discentes_contents)
     
-    # Lista final para armazenar todos os dados formatados
-    todos_dados = []
-    
-    # Formatando os docentes permanentes e colaboradores
-    docentes = docentes_xls[['NOME', 'CATEGORIA']].dropna()
-    for _, row in docentes.iterrows():
-        categoria = 'DP' if row['CATEGORIA'].lower() == 'permanente' else 'DC'
-        nome_formatado = formatar_nome_autor(row['NOME'])
-        todos_dados.append({
-            "Nome Completo": row['NOME'],
-            "Categoria": categoria,
-            "APA": nome_formatado["APA"],
-            "ABNT": nome_formatado["ABNT"],
-            "Custom": nome_formatado["Custom"]
-        })
-    
-    # Formatando os discentes
-    for discente_nome in discentes_json:
-        nome_formatado = formatar_nome_autor(discente_nome)
-        todos_dados.append({
-            "Nome Completo": discente_nome,
-            "Categoria": 'DISC',
-            "APA": nome_formatado["APA"],
-            "ABNT": nome_formatado["ABNT"],
-            "Custom": nome_formatado["Custom"]
-        })
+    # Cadastro com todos os dados formatados, compilado para a identificação dos autores
+    todos_dados = montar_cadastro(docentes_xls, discentes_json)
+    participantes = IndiceParticipantes(todos_dados)
 
-    # Definir caminho para salvar o arquivo
-    caminho = "C:\\Users\\Decivil\\Dropbox\\PPGEC\\Indicadores\\chatgpt\\FastAPI"
-    
-    # Salvar os dados no arquivo XLSX
-    arquivo_salvo = salvar_em_arquivo_excel(todos_dados, caminho)
+    os.makedirs(PASTA_CADASTRO, exist_ok=True)
+    resposta = {"mensagem": "Cadastro compilado gerado com sucesso", "pessoas": len(participantes)}
+    if gerar_planilha:
+        resposta["planilha"] = salvar_em_arquivo_excel(todos_dados, PASTA_CADASTRO)
 
-    return {"mensagem": "Arquivo XLSX gerado com sucesso", "caminho": arquivo_salvo}
+    # Gravar o cadastro compilado, carregado direto pelo serviço de análise enquanto a planilha da pasta não mudar
+    caminho_planilha = os.path.join(PASTA_CADASTRO, ARQUIVO_DOCENTES_DISCENTES)
+    hash_planilha = hash_arquivo(caminho_planilha) if os.path.exists(caminho_planilha) else None
+    caminho_cadastro = os.path.join(PASTA_CADASTRO, ARQUIVO_CADASTRO)
+    salvar_cadastro(participantes, caminho_cadastro, hash_planilha)
+    resposta["caminho"] = caminho_cadastro
+    return resposta
@@ -0,0 +1,144 @@
+"""Índices de ISSN construídos uma única vez sobre as tabelas de referência.
+
+Cada índice é indexado pelo ISSN normalizado (sem traço e sem espaços) e
+mantém a primeira ocorrência da tabela original, reproduzindo o resultado
+da antiga busca linear (`iloc[0]`).
+
+Os índices do JCR e do SJR de vários anos são reunidos em uma única tabela
+(`MetricasPorAno`), consultada pelo par (ISSN, ano do artigo).
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+
+def normalizar_issns(issns: pd.Series) -> pd.Series:
+    """Normaliza uma coluna inteira de ISSNs em uma única operação vetorizada."""
+    return issns.astype(str).str.replace("-", "").str.strip()
+
+def normalizar_issns_consulta(issns: list) -> pd.Series:
+    """Normaliza ISSNs avulsos de uma consulta (vazios são tratados como nos artigos sem ISSN)."""
+    chaves = normalizar_issns(pd.Series(issns, dtype=object))
+    return chaves.mask(chaves == '', 'Sem ISSN')
+
+# Qualis
+def construir_indice_qualis(qualis_df: pd.DataFrame) -> pd.Series:
+    """Monta o índice ISSN -> Estrato a partir da tabela Qualis já normalizada."""
+    validos = qualis_df.dropna(subset=['ISSN']).drop_duplicates(subset='ISSN', keep='first')
+    return validos.set_index('ISSN')['Estrato']
+
+def classificar_qualis(chaves: pd.Series, indice_qualis: pd.Series) -> pd.Series:
+    """Classifica todos os ISSNs (já normalizados) de um currículo de uma vez ("NP" quando não encontrado)."""
+    estratos = chaves.map(indice_qualis)
+    return estratos.where(chaves.isin(indice_qualis.index), "NP")
+
+# SJR
+def construir_indice_sjr(sjr_df: pd.DataFrame) -> pd.DataFrame:
+    """Monta o índice invertido ISSN -> (SJR, SJR Best Quartile).
+
+    O campo Issn do SJR traz vários ISSNs separados por vírgula; cada um deles
+    vira uma entrada do índice apontando para a linha do periódico.
+    """
+    validos = sjr_df.dropna(subset=['Issn'])
+    explodido = validos[['SJR', 'SJR Best Quartile']].assign(ISSN=validos['Issn'].str.split(',')).explode('ISSN')
+    explodido['ISSN'] = explodido['ISSN'].str.strip().str.replace("-", "")
+    explodido = explodido.drop_duplicates(subset='ISSN', keep='first')
+    return explodido.set_index('ISSN')[['SJR', 'SJR Best Quartile']]
+
+# JCR
+QUARTIS = ('Q1', 'Q2', 'Q3', 'Q4')  # Do melhor para o pior
+
+def formatar_jif(jif) -> str:
+    """Converte o ponto decimal para vírgula (valores textuais, como "<0,1", são mantidos)."""
+    if isinstance(jif, str):
+        return jif
+    return f"{jif:.2f}".replace('.', ',')
+
+def coluna_jif(jcr_df: pd.DataFrame) -> tuple:
+    """Localiza a coluna '<ano> JIF' da tabela JCR e retorna (coluna, ano)."""
+    for coluna in jcr_df.columns:
+        encontrado = re.fullmatch(r'(\d{4}) JIF', str(coluna))
+        if encontrado:
+            return coluna, int(encontrado.group(1))
+    raise ValueError("Coluna '<ano> JIF' não encontrada na tabela JCR.")
+
+def construir_indice_jcr(jcr_df: pd.DataFrame) -> pd.DataFrame:
+    """Monta o índice único ISSN/eISSN -> (JIF já formatado, JIF Quartile).
+
+    Um periódico listado em várias categorias aparece em várias linhas do JCR.
+    O JIF vem da primeira linha em que o ISSN aparece, seja como ISSN impresso
+    ou eletrônico, e o quartil é o melhor entre as suas categorias (Q1 a Q4;
+    sem nenhum deles, o primeiro valor informado), a mesma regra do
+    consolidar_csv.py ao gerar o 'JCR tabelado.xlsx'.
+    """
+    coluna, _ = coluna_jif(jcr_df)
+    registros = pd.DataFrame({
+        'JIF': jcr_df[coluna].map(formatar_jif),
+        'JIF Quartile': jcr_df['JIF Quartile'],
+    })
+    chaves = pd.concat([
+        registros.assign(ISSN=jcr_df['ISSN']),
+        registros.assign(ISSN=jcr_df['eISSN']),
+    ]).sort_index(kind='stable')
+    chaves = chaves.dropna(subset=['ISSN'])
+
+    # Posição do quartil, do melhor para o pior; outros valores vêm depois e os vazios por último
+    posicao = chaves['JIF Quartile'].map({quartil: i for i, quartil in enumerate(QUARTIS)})
+    posicao = posicao.fillna(len(QUARTIS)).mask(chaves['JIF Quartile'].isna(), len(QUARTIS) + 1)
+    melhor_quartil = chaves.assign(posicao=posicao).sort_values('posicao', kind='stable').drop_duplicates(subset='ISSN')
+    indice = chaves.drop_duplicates(subset='ISSN', keep='first').set_index('ISSN')[['JIF', 'JIF Quartile']]
+    indice['JIF Quartile'] = melhor_quartil.set_index('ISSN')['JIF Quartile']
+    return indice
+
+# Métricas de vários anos (JCR e SJR)
+class MetricasPorAno:
+    """Métricas de periódicos de vários anos em uma única tabela indexada por (ISSN, ano).
+
+    Cada artigo recebe a métrica do seu ano de publicação ou, se esse ano não
+    estiver disponível, a do ano mais próximo (o anterior, em caso de empate).
+    """
+
+    def __init__(self, indices_por_ano: dict):
+        partes = [indice.assign(Ano=ano) for ano, indice in sorted(indices_por_ano.items())]
+        self.colunas = list(partes[0].columns.drop('Ano')) if partes else []
+        self.anos = sorted(indices_por_ano)
+        tabela = pd.concat(partes).rename_axis('ISSN').reset_index() if partes else pd.DataFrame(columns=['ISSN', 'Ano'])
+        tabela = tabela.astype({'Ano': 'int64'}).sort_values('Ano', kind='stable', ignore_index=True)
+        tabela['Ano da métrica'] = tabela['Ano']  # 'Ano' é consumido pela junção; esta cópia sobrevive a ela
+        self.tabela = tabela
+
+    def consultar(self, chaves: pd.Series, anos=None, ausente: str = "---") -> pd.DataFrame:
+        """Consulta todos os ISSNs (já normalizados) de uma vez, em uma única junção por (ISSN, ano mais próximo).
+
+        Sem `anos`, usa o ano mais recente disponível. A coluna 'Ano' do
+        resultado informa o ano da métrica usada.
+        """
+        if anos is None:
+            anos = self.anos[-1] if self.anos else 0
+        # A chave da junção precisa ter o mesmo tipo da tabela, inclusive numa consulta vazia
+        issns = pd.Series(chaves.to_numpy(), dtype=self.tabela['ISSN'].dtype)
+        consulta = pd.DataFrame({'ISSN': issns, 'Ano': anos, 'posicao': np.arange(len(chaves))})
+        consulta = consulta.astype({'Ano': 'int64'}).sort_values('Ano', kind='stable')
+        juntos = pd.merge_asof(consulta, self.tabela, on='Ano', by='ISSN', direction='nearest')
+
+        # Volta à ordem original dos artigos e preenche os ISSNs não encontrados
+        ordem = np.argsort(juntos['posicao'].to_numpy())
+        anos_metrica = juntos['Ano da métrica'].to_numpy()[ordem]
+        encontrados = ~np.isnan(anos_metrica)
+        resultado = {
+            coluna: np.where(encontrados, juntos[coluna].to_numpy(dtype=object)[ordem], ausente)
+            for coluna in self.colunas
+        }
+        resultado['Ano'] = [int(ano) if achou else ausente for ano, achou in zip(anos_metrica, encontrados)]
+        return pd.DataFrame(resultado, index=chaves.index)
+
+def consultar_jcr(chaves: pd.Series, anos, metricas_jcr: MetricasPorAno) -> pd.DataFrame:
+    """Retorna JIF, JIF Quartile e o ano do JCR usado para todos os ISSNs de um currículo."""
+    resultado = metricas_jcr.consultar(chaves, anos)
+    return resultado.rename(columns={'JIF': '2023 JIF', 'Ano': 'Ano JCR'})
+
+def consultar_sjr(chaves: pd.Series, anos, metricas_sjr: MetricasPorAno) -> pd.DataFrame:
+    """Retorna SJR, SJR Best Quartile e o ano do SJR usado para todos os ISSNs de um currículo."""
+    resultado = metricas_sjr.consultar(chaves, anos)
+    return resultado.rename(columns={'Ano': 'Ano SJR'})
@@ -1,19 +1,35 @@
-from fastapi import FastAPI, File, UploadFile, Query, Body
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, File, UploadFile, Query, Body, Header, Form
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-import zipfile
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import hashlib
+import hmac
+import json
+import multiprocessing
 import os
+import tempfile
+import zipfile
 import pandas as pd
 import io
 from io import BytesIO, StringIO  # Para trabalhar com streams de arquivo
 from openpyxl import Workbook
 import xml.etree.ElementTree as ET
-import unidecode
-import math  # Para verificar valores fora do intervalo
-import uuid
-import shutil  # Para remover a pasta temporária após o uso
 from pydantic import BaseModel
 from typing import List, Optional
+from referencias import atualizar_participantes, carregar_referencias
+from participantes import CATEGORIAS
+from indices import classificar_qualis, consultar_jcr, consultar_sjr, normalizar_issns, normalizar_issns_consulta
+from cache_resultados import CacheResultados, chave_resultado
+from datasets import TIPOS, RegistroDatasets, classificar_issns_dataset
+from tarefas import CONCLUIDA, ERRO, GerenciadorTarefas
+from exportacao import TABELAS, cabecalho_download, gerar_csv, gravar_xlsx, ler_em_blocos, ler_resultado, nome_base_exportacao, tabela_artigos, tabela_pontuacao
+from serializacao import (
+    TAMANHO_MINIMO_COMPRESSAO, acrescentar_campos, comprimir, converter_para_colunas, montar_lista_json,
+    montar_objeto_json, ndjson_para_lista, negociar_compressao, tabela_para_json, tabela_para_ndjson
+)
 
 # Modelo de artigo
 class Artigo(BaseModel):
@@ -26,8 +42,50 @@ class Artigo(BaseModel):
     DC: Optional[int] = 0
     DIS: Optional[int] = 0
 
+# Modelo de um docente/discente acrescentado ao cadastro
+class Participante(BaseModel):
+    nome: str
+    categoria: str  # DP, DC ou DISC
+    idCnpq: Optional[str] = None
+
+# Modelo da consulta de ISSNs em lote
+class ConsultaISSNs(BaseModel):
+    issns: List[str]
+    ano: Optional[int] = None  # Ano do JCR/SJR (padrão: o mais recente; senão, o mais próximo disponível)
+
+# Carga única dos dados de referência na inicialização do servidor
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Carrega as tabelas de referência antes de liberar o tráfego.
+
+    O pool de threads, o semáforo das análises e a trava das recargas são
+    criados aqui, a cada ciclo de vida do app, e encerrados no fim dele.
+    """
+    app.state.pool_threads = ThreadPoolExecutor(max_workers=WORKERS_ANALISE, thread_name_prefix="analise")
+    app.state.limite_analises = asyncio.Semaphore(LIMITE_ANALISES_SIMULTANEAS)
+    app.state.trava_referencias = asyncio.Lock()
+    try:
+        app.state.referencias = await asyncio.to_thread(carregar_referencias)
+    except Exception as e:
+        app.state.erro_referencias = str(e)
+        print(f"Erro ao carregar os dados de referência: {e}")
+    yield
+    tarefas.cancelar_todas()
+    app.state.pool_threads.shutdown(cancel_futures=True)
+    for pool, _ in app.state.pools_lote.values():
+        pool.shutdown(cancel_futures=True)
+    app.state.pools_lote.clear()
+
 # Inicialização do aplicativo FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.state.referencias = None
+app.state.erro_referencias = None
+app.state.pools_lote = {}  # Versão das referências -> [pool de processos, análises usando o pool]
+app.state.recarga = None
+app.state.erro_recarga = None
+
+# Token exigido pelos endpoints administrativos (sem ele, esses endpoints ficam desativados)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 # Configuração de CORS para permitir requisições de diferentes origens
 app.add_middleware(
@@ -42,76 +100,237 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Coluna interna com os autores estruturados (não é enviada na resposta)
+COLUNA_AUTORES_DETALHE = '_autores'
+
 # Funções utilitárias
 def formatar_issn(issn: str) -> str:
     """Formata o ISSN no formato XXXX-XXXX."""
     issn = issn.replace("-", "").strip()
     return f"{issn[:4]}-{issn[4:]}" if len(issn) == 8 else issn
 
-def normalizar_issn(issn: str) -> list:
-    """Converte múltiplos ISSNs em uma lista normalizada."""
-    return [i.strip().replace("-", "") for i in issn.split(',')]
-
 def formatar_doi(doi: str) -> str:
     """Formata o DOI no formato http://dx.doi.org/xxxxx."""
     return doi.strip() if doi.lower().startswith(("http://", "https://")) else f"http://dx.doi.org/{doi.strip()}"
 
-def formatar_jif(jif: float) -> str:
-    """Converte o ponto decimal para vírgula."""
-    return f"{jif:.2f}".replace('.', ',')
-
-def sanitize_float_values(data):
-    """Substitui valores fora do intervalo (NaN, inf, -inf) por None."""
-    if isinstance(data, dict):
-        return {k: sanitize_float_values(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [sanitize_float_values(item) for item in data]
-    elif isinstance(data, float):
-        if math.isnan(data) or math.isinf(data):
-            return None
-    return data
+# Formatos de resposta: escolhidos pelo parâmetro `formato` ou pelo cabeçalho Accept
+MIDIA_NDJSON = "application/x-ndjson"
+MIDIA_COLUNAS = "application/vnd.analisador.colunas+json"
+
+def escolher_formato(formato, accept, permitidos=("json", "colunas")):
+    """Retorna o formato pedido ("json", "colunas" ou "ndjson"), ou None se ele não for aceito pelo endpoint."""
+    if not formato:
+        accept = accept or ""
+        formato = "ndjson" if MIDIA_NDJSON in accept else "colunas" if MIDIA_COLUNAS in accept else "json"
+    return formato if formato in permitidos else None
+
+def formato_invalido(permitidos=("json", "colunas")):
+    """Resposta padrão para um formato não suportado pelo endpoint."""
+    opcoes = ", ".join(f"'{formato}'" for formato in permitidos)
+    return JSONResponse(status_code=400, content={"message": f"Formato inválido. Use {opcoes}."})
+
+async def resposta_json(conteudo: bytes, formato: str = "json", accept_encoding: str = None, status_code: int = 200):
+    """Resposta com um JSON já serializado (sem passar pelo codificador do FastAPI).
+
+    No formato "colunas", as tabelas são enviadas como arrays por coluna. O
+    corpo é comprimido com brotli ou gzip quando o cliente aceita.
+    """
+    def preparar():
+        corpo = converter_para_colunas(conteudo) if formato == "colunas" else conteudo
+        codificacao = negociar_compressao(accept_encoding) if len(corpo) >= TAMANHO_MINIMO_COMPRESSAO else None
+        return (comprimir(corpo, codificacao) if codificacao else corpo), codificacao
+
+    corpo, codificacao = await asyncio.to_thread(preparar)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if codificacao:
+        headers["Content-Encoding"] = codificacao
+    media_type = MIDIA_COLUNAS if formato == "colunas" else "application/json"
+    return Response(content=corpo, status_code=status_code, headers=headers, media_type=media_type)
+
+# Limites para os arquivos enviados (protegem o worker contra ZIPs maliciosos)
+LIMITE_TAMANHO_ZIP = 20 * 1024 * 1024    # Tamanho máximo do ZIP enviado
+LIMITE_TAMANHO_XML = 100 * 1024 * 1024   # Tamanho máximo do XML (descompactado)
+LIMITE_TAXA_COMPRESSAO = 100             # Razão máxima entre tamanho descompactado e compactado
+LIMITE_ARQUIVOS_ZIP = 100                # Número máximo de arquivos dentro do ZIP
+LIMITE_TAMANHO_LOTE = 500 * 1024 * 1024  # Soma máxima dos XMLs (descompactados) de um lote
+
+# Número de processos usados na análise em lote (padrão: um por núcleo)
+WORKERS_LOTE = int(os.getenv("WORKERS_LOTE", os.cpu_count() or 1))
+
+# Execução da análise fora do event loop: "thread" (padrão) ou "processo" (usa o pool do lote)
+MODO_ANALISE = os.getenv("MODO_ANALISE", "thread")
+if MODO_ANALISE not in ("thread", "processo"):
+    raise ValueError(f"MODO_ANALISE inválido: {MODO_ANALISE} (use 'thread' ou 'processo').")
+WORKERS_ANALISE = int(os.getenv("WORKERS_ANALISE", min(4, os.cpu_count() or 1)))
+
+# Máximo de análises em andamento ao mesmo tempo; as demais aguardam sem ocupar o event loop
+LIMITE_ANALISES_SIMULTANEAS = int(os.getenv("LIMITE_ANALISES_SIMULTANEAS", max(WORKERS_ANALISE, WORKERS_LOTE)))
+
+# Cache de resultados por conteúdo do XML + versão das referências (pasta em disco opcional)
+cache_resultados = CacheResultados(
+    capacidade=int(os.getenv("CACHE_RESULTADOS_TAMANHO", 128)),
+    pasta=os.getenv("CACHE_RESULTADOS_PASTA") or None
+)
+
+# Tarefas em segundo plano: resultados concluídos ficam disponíveis por TTL_TAREFAS segundos
+tarefas = GerenciadorTarefas(ttl=float(os.getenv("TTL_TAREFAS", 3600)))
+
+# Planilhas de referência avulsas registradas por hash (LRU limitado pela memória dos índices)
+LIMITE_TAMANHO_DATASET = 50 * 1024 * 1024  # Tamanho máximo da planilha enviada
+datasets = RegistroDatasets(capacidade_bytes=int(os.getenv("LIMITE_DATASETS_MB", 256)) * 1024 * 1024)
 
 # Funções para processar arquivos
-def processar_zip(contents, temp_folder):
-    """Descompacta o ZIP e localiza o arquivo XML."""
+def validar_membro_xml(info):
+    """Valida um XML dentro do ZIP antes de descompactá-lo. Retorna a mensagem de erro ou None."""
+    if info.flag_bits & 0x1:
+        return f"O arquivo {info.filename} está protegido por senha."
+    if info.file_size > LIMITE_TAMANHO_XML:
+        return f"O arquivo {info.filename} excede o tamanho máximo permitido."
+    if info.file_size > 0 and (info.compress_size == 0 or info.file_size / info.compress_size > LIMITE_TAXA_COMPRESSAO):
+        return f"O arquivo {info.filename} tem taxa de compressão suspeita."
+    return None
+
+def processar_zip(contents):
+    """Valida o ZIP e abre o XML em fluxo, direto da memória, sem extrair para o disco."""
+    if len(contents) > LIMITE_TAMANHO_ZIP:
+        return None, "O arquivo ZIP excede o tamanho máximo permitido."
     try:
         with zipfile.ZipFile(BytesIO(contents), 'r') as zip_ref:
-            zip_ref.extractall(temp_folder)
+            membros = zip_ref.infolist()
+            if len(membros) > LIMITE_ARQUIVOS_ZIP:
+                return None, "O arquivo ZIP contém arquivos demais."
+
+            xml_files = [m for m in membros if not m.is_dir() and '/' not in m.filename and m.filename.endswith('.xml')]
+            if not xml_files:
+                return None, "Nenhum arquivo XML encontrado no ZIP."
 
-        xml_files = [f for f in os.listdir(temp_folder) if f.endswith('.xml')]
-        if not xml_files:
-            return None, "Nenhum arquivo XML encontrado no ZIP."
+            erro = validar_membro_xml(xml_files[0])
+            if erro:
+                return None, erro
 
-        xml_path = os.path.join(temp_folder, xml_files[0])
-        return xml_path, "Arquivo XML extraído com sucesso."
+            return zip_ref.open(xml_files[0]), "Arquivo XML extraído com sucesso."
     except Exception as e:
         return None, f"Erro ao descompactar o arquivo ZIP: {e}"
 
-def processar_xml(xml_path):
-    """Extrai o nome da pessoa e os dados dos artigos do XML."""
+def abrir_xml(nome_arquivo, contents):
+    """Abre o XML enviado, diretamente ou de dentro de um ZIP, como fluxo em memória."""
+    if nome_arquivo.endswith(".zip"):
+        return processar_zip(contents)
+    if nome_arquivo.endswith(".xml"):
+        if len(contents) > LIMITE_TAMANHO_XML:
+            return None, "O arquivo XML excede o tamanho máximo permitido."
+        return BytesIO(contents), "Arquivo XML carregado diretamente."
+    return None, "Formato de arquivo não suportado. Envie um arquivo .zip ou .xml."
+
+def listar_curriculos_lote(nome_arquivo, contents, limite_restante=LIMITE_TAMANHO_LOTE, permitir_zip_interno=True):
+    """Lista os currículos de um envio em lote.
+
+    Aceita um XML avulso, um ZIP com um currículo ou um ZIP com vários
+    currículos (XMLs e ZIPs de currículo, como a pasta exportada do Lattes).
+    Os membros do ZIP só são descompactados se o tamanho declarado ainda
+    couber em `limite_restante` (o que falta do tamanho máximo do lote).
+    Retorna a lista de (nome, bytes do XML) e a lista de erros por arquivo.
+    """
+    if nome_arquivo.endswith(".xml"):
+        if len(contents) > LIMITE_TAMANHO_XML:
+            return [], [{"arquivo": nome_arquivo, "message": "O arquivo XML excede o tamanho máximo permitido."}]
+        return [(nome_arquivo, contents)], []
+    if not nome_arquivo.endswith(".zip"):
+        return [], [{"arquivo": nome_arquivo, "message": "Formato de arquivo não suportado. Envie um arquivo .zip ou .xml."}]
+    if len(contents) > LIMITE_TAMANHO_ZIP:
+        return [], [{"arquivo": nome_arquivo, "message": "O arquivo ZIP excede o tamanho máximo permitido."}]
+
+    curriculos, erros = [], []
     try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
+        with zipfile.ZipFile(BytesIO(contents), 'r') as zip_ref:
+            membros = [m for m in zip_ref.infolist() if not m.is_dir()]
+            if len(membros) > LIMITE_ARQUIVOS_ZIP:
+                return [], [{"arquivo": nome_arquivo, "message": "O arquivo ZIP contém arquivos demais."}]
+
+            tamanho_lido = 0
+            for membro in membros:
+                nome_membro = f"{nome_arquivo}/{membro.filename}"
+                if not (membro.filename.endswith(".xml") or (membro.filename.endswith(".zip") and permitir_zip_interno)):
+                    continue
+                erro = validar_membro_xml(membro)
+                if erro is None and tamanho_lido + membro.file_size > limite_restante:
+                    erro = "O lote excede o tamanho máximo permitido."
+                if erro:
+                    erros.append({"arquivo": nome_membro, "message": erro})
+                elif membro.filename.endswith(".xml"):
+                    curriculos.append((nome_membro, zip_ref.read(membro)))
+                    tamanho_lido += membro.file_size
+                else:
+                    internos, erros_internos = listar_curriculos_lote(
+                        nome_membro, zip_ref.read(membro), limite_restante - tamanho_lido, permitir_zip_interno=False
+                    )
+                    curriculos.extend(internos)
+                    erros.extend(erros_internos)
+                    tamanho_lido += sum(len(dados) for _, dados in internos)
+    except Exception as e:
+        erros.append({"arquivo": nome_arquivo, "message": f"Erro ao descompactar o arquivo ZIP: {e}"})
+    return curriculos, erros
+
+# Elementos filhos de ARTIGO-PUBLICADO lidos na extração (preservados até o artigo se fechar)
+TAGS_DO_ARTIGO = {'DADOS-BASICOS-DO-ARTIGO', 'DETALHAMENTO-DO-ARTIGO', 'AUTORES'}
+
+def extrair_artigo(artigo):
+    """Extrai os dados de um elemento ARTIGO-PUBLICADO."""
+    titulo = artigo.find('DADOS-BASICOS-DO-ARTIGO').get('TITULO-DO-ARTIGO', 'Sem Título')
+    ano = int(artigo.find('DADOS-BASICOS-DO-ARTIGO').get('ANO-DO-ARTIGO', '0'))
+    autores_detalhe = [
+        {
+            'nome': autor.get('NOME-COMPLETO-DO-AUTOR'),
+            'citacao': autor.get('NOME-PARA-CITACAO', ''),
+            'id_cnpq': autor.get('NRO-ID-CNPQ', ''),
+        }
+        for autor in artigo.findall('AUTORES')
+    ]
+    autores = '; '.join([autor['nome'] for autor in autores_detalhe])
+    issn = formatar_issn(artigo.find('DETALHAMENTO-DO-ARTIGO').get('ISSN', 'Sem ISSN'))
+    titulo_periodico = artigo.find('DETALHAMENTO-DO-ARTIGO').get('TITULO-DO-PERIODICO-OU-REVISTA', 'Sem Título do Periódico')
+    doi = artigo.find('DADOS-BASICOS-DO-ARTIGO').get('DOI', 'Sem DOI')
+
+    return {
+        'Título': titulo,
+        'Autores': autores,
+        COLUNA_AUTORES_DETALHE: autores_detalhe,
+        'Ano': ano,
+        'ISSN': issn,
+        'Título do Periódico': titulo_periodico,
+        'DOI': doi
+    }
 
-        nome_pessoa = root.find(".//DADOS-GERAIS").get("NOME-COMPLETO", "Nome não encontrado")
+def extrair_registros_lattes(xml_fonte):
+    """Percorre o XML em fluxo e gera apenas os registros ('DADOS-GERAIS', nome) e ('ARTIGO-PUBLICADO', artigo).
+
+    Cada subárvore é descartada assim que se fecha, de modo que bancas, eventos,
+    orientações e projetos não permanecem em memória.
+    """
+    for _, elemento in ET.iterparse(xml_fonte, events=('end',)):
+        tag = elemento.tag
+        if tag in TAGS_DO_ARTIGO:
+            continue
+        if tag == 'ARTIGO-PUBLICADO':
+            yield tag, extrair_artigo(elemento)
+        elif tag == 'DADOS-GERAIS':
+            yield tag, elemento.get("NOME-COMPLETO", "Nome não encontrado")
+        elemento.clear()
+
+def processar_xml(xml_fonte):
+    """Extrai o nome da pessoa e os dados dos artigos do XML (caminho ou arquivo aberto)."""
+    try:
+        nome_pessoa = None
         artigos = []
 
-        for artigo in root.findall('.//ARTIGO-PUBLICADO'):
-            titulo = artigo.find('DADOS-BASICOS-DO-ARTIGO').get('TITULO-DO-ARTIGO', 'Sem Título')
-            ano = int(artigo.find('DADOS-BASICOS-DO-ARTIGO').get('ANO-DO-ARTIGO', '0'))
-            autores = '; '.join([autor.get('NOME-COMPLETO-DO-AUTOR') for autor in artigo.findall('AUTORES')])
-            issn = formatar_issn(artigo.find('DETALHAMENTO-DO-ARTIGO').get('ISSN', 'Sem ISSN'))
-            titulo_periodico = artigo.find('DETALHAMENTO-DO-ARTIGO').get('TITULO-DO-PERIODICO-OU-REVISTA', 'Sem Título do Periódico')
-            doi = artigo.find('DADOS-BASICOS-DO-ARTIGO').get('DOI', 'Sem DOI')
-
-            artigos.append({
-                'Título': titulo,
-                'Autores': autores,
-                'Ano': ano,
-                'ISSN': issn,
-                'Título do Periódico': titulo_periodico,
-                'DOI': doi
-            })
+        for tag, registro in extrair_registros_lattes(xml_fonte):
+            if tag == 'ARTIGO-PUBLICADO':
+                artigos.append(registro)
+            elif nome_pessoa is None:
+                nome_pessoa = registro
+
+        if nome_pessoa is None:
+            raise ValueError("elemento DADOS-GERAIS não encontrado")
 
         return nome_pessoa, pd.DataFrame(artigos).sort_values(by='Ano')
 
@@ -119,155 +338,728 @@ def processar_xml(xml_path):
         print(f"Erro ao processar o XML: {e}")
         return None, pd.DataFrame()
 
-# Funções para buscar classificações (Qualis, JCR, SJR)
-def buscar_qualis(issn, qualis_df):
-    """Busca a classificação Qualis pelo ISSN."""
-    issn_cleaned = issn.replace("-", "").strip()
-    qualis_df['ISSN'] = qualis_df['ISSN'].str.replace("-", "").str.strip()
-    qualis_row = qualis_df[qualis_df['ISSN'] == issn_cleaned]
-    return qualis_row.iloc[0]['Estrato'] if not qualis_row.empty else "NP"
-
-def buscar_jcr(issn, jcr_df):
-    """Busca o JCR e Quartil pelo ISSN ou eISSN."""
-    issn_cleaned = issn.replace("-", "").strip()
-    jcr_df['ISSN'] = jcr_df['ISSN'].astype(str).str.replace("-", "").str.strip()
-    jcr_df['eISSN'] = jcr_df['eISSN'].astype(str).str.replace("-", "").str.strip()
-    jcr_row = jcr_df[(jcr_df['ISSN'] == issn_cleaned) | (jcr_df['eISSN'] == issn_cleaned)]
-    if not jcr_row.empty:
-        return formatar_jif(jcr_row.iloc[0]['2023 JIF']), jcr_row.iloc[0]['JIF Quartile']
-    return "---", "---"
-
-def buscar_sjr(issn, sjr_df):
-    """Busca o SJR e Quartil pelo ISSN."""
-    issn_cleaned = issn.replace("-", "").strip()
-    sjr_df['ISSN_list'] = sjr_df['Issn'].apply(normalizar_issn)
-    sjr_row = sjr_df[sjr_df['ISSN_list'].apply(lambda x: issn_cleaned in x)]
-    if not sjr_row.empty:
-        return sjr_row.iloc[0]['SJR'], sjr_row.iloc[0]['SJR Best Quartile']
-    return "---", "---"
-
 # Função para quantificar DP, DC e DIS comparando com múltiplos formatos de nomes
-def quantificar_participantes(autores, docentes_discentes_df):
-    """Compara os autores com os docentes/discentes e conta DP, DC e DIS."""
-    dp_count, dc_count, dis_count = 0, 0, 0
-    for autor in autores.split(';'):
-        autor_normalizado = unidecode.unidecode(autor.strip().lower())
-        match = docentes_discentes_df[
-            (docentes_discentes_df['Nome Completo'].apply(lambda x: autor_normalizado in unidecode.unidecode(x.lower()))) |
-            (docentes_discentes_df['APA'].apply(lambda x: autor_normalizado in unidecode.unidecode(x.lower()))) |
-            (docentes_discentes_df['ABNT'].apply(lambda x: autor_normalizado in unidecode.unidecode(x.lower()))) |
-            (docentes_discentes_df['Custom'].apply(lambda x: autor_normalizado in unidecode.unidecode(x.lower())))
-        ]
-        if not match.empty:
-            categoria = match.iloc[0]['Categoria']
-            if categoria == 'DP':
-                dp_count += 1
-            elif categoria == 'DC':
-                dc_count += 1
-            else:
-                dis_count += 1
-    return dp_count, dc_count, dis_count
+def quantificar_participantes(autores, participantes):
+    """Compara os autores (estruturados, com ID CNPq e nomes de citação) com os docentes/discentes e conta DP, DC e DIS."""
+    return participantes.quantificar(autores)
+
+# Pesos de cada estrato Qualis
+PONTUACAO_QUALIS = {
+    "A1": 1.0, "A2": 0.9, "A3": 0.75, "A4": 0.6,
+    "B1": 0.4, "B2": 0.3, "B3": 0.15, "B4": 0.05,
+    "C": 0, "NP": 0
+}
+ESTRATOS_A = ['A1', 'A2', 'A3', 'A4']
+ESTRATOS_B = ['B1', 'B2', 'B3', 'B4']
 
 # Função para calcular pontuação Qualis
 def calcular_pontuacao_qualis(artigos_df):
-    """Calcula a pontuação Qualis dos artigos agrupados por ano e dividida pelo número de DP."""
-    pontuacao = {
-        "A1": 1.0, "A2": 0.9, "A3": 0.75, "A4": 0.6,
-        "B1": 0.4, "B2": 0.3, "B3": 0.15, "B4": 0.05,
-        "C": 0, "NP": 0
-    }
+    """Calcula a tabela de pontuação Qualis dos artigos agrupados por ano e dividida pelo número de DP."""
+    # Pontos de cada artigo: peso do estrato dividido por max(DP, 1)
+    pontos = artigos_df['Qualis'].map(PONTUACAO_QUALIS).fillna(0) / artigos_df['DP'].clip(lower=1)
 
-    def calcular_pontos_por_qualis(qualis, dp):
-        return pontuacao.get(qualis, 0) / max(dp, 1)
-
-    # Criar uma nova tabela de pontuações por ano
-    pontuacao_anos = artigos_df.groupby('Ano').apply(
-        lambda x: pd.Series({
-            'A1': sum(calcular_pontos_por_qualis(row['Qualis'], row['DP']) for _, row in x.iterrows() if row['Qualis'] == 'A1'),
-            'A2': sum(calcular_pontos_por_qualis(row['Qualis'], row['DP']) for _, row in x.iterrows() if row['Qualis'] == 'A2'),
-            'A3': sum(calcular_pontos_por_qualis(row['Qualis'], row['DP']) for _, row in x.iterrows() if row['Qualis'] == 'A3'),
-            'A4': sum(calcular_pontos_por_qualis(row['Qualis'], row['DP']) for _, row in x.iterrows() if row['Qualis'] == 'A4'),
-            'B1': sum(calcular_pontos_por_qualis(row['Qualis'], row['DP']) for _, row in x.iterrows() if row['Qualis'] == 'B1'),
-            'B2': sum(calcular_pontos_por_qualis(row['Qualis'], row['DP']) for _, row in x.iterrows() if row['Qualis'] == 'B2'),
-            'B3': sum(calcular_pontos_por_qualis(row['Qualis'], row['DP']) for _, row in x.iterrows() if row['Qualis'] == 'B3'),
-            'B4': sum(calcular_pontos_por_qualis(row['Qualis'], row['DP']) for _, row in x.iterrows() if row['Qualis'] == 'B4'),
-            'C': sum(calcular_pontos_por_qualis(row['Qualis'], row['DP']) for _, row in x.iterrows() if row['Qualis'] == 'C'),
-            'NP': sum(calcular_pontos_por_qualis(row['Qualis'], row['DP']) for _, row in x.iterrows() if row['Qualis'] == 'NP'),
-            'Total A': sum(calcular_pontos_por_qualis(row['Qualis'], row['DP']) for _, row in x.iterrows() if row['Qualis'] in ['A1', 'A2', 'A3', 'A4']),
-            'Total B': sum(calcular_pontos_por_qualis(row['Qualis'], row['DP']) for _, row in x.iterrows() if row['Qualis'] in ['B1', 'B2', 'B3', 'B4']),
-        })
-    )
+    # Tabela Ano x Qualis em uma única agregação
+    pontuacao_anos = pontos.groupby([artigos_df['Ano'], artigos_df['Qualis']]).sum().unstack(fill_value=0.0)
+    pontuacao_anos = pontuacao_anos.reindex(
+        index=pd.Index(sorted(artigos_df['Ano'].unique()), name='Ano'),
+        columns=list(PONTUACAO_QUALIS),
+        fill_value=0.0
+    ).astype(float)
+    pontuacao_anos.columns.name = None
+    pontuacao_anos['Total A'] = pontuacao_anos[ESTRATOS_A].sum(axis=1)
+    pontuacao_anos['Total B'] = pontuacao_anos[ESTRATOS_B].sum(axis=1)
 
     # Adicionar os percentuais e evitar divisão por zero
     pontuacao_anos['Total'] = pontuacao_anos['Total A'] + pontuacao_anos['Total B']
     pontuacao_anos['% A'] = (pontuacao_anos['Total A'] / pontuacao_anos['Total']) * 100 if pontuacao_anos['Total'].sum() > 0 else 0
     pontuacao_anos['% B'] = (pontuacao_anos['Total B'] / pontuacao_anos['Total']) * 100 if pontuacao_anos['Total'].sum() > 0 else 0
 
-    return pontuacao_anos.reset_index().to_dict(orient="records")
+    return pontuacao_anos.reset_index()
+
+# Enriquecimento dos artigos com as referências
+def enriquecer_artigos(artigos_df, referencias):
+    """Acrescenta Qualis, JCR, SJR e DP/DC/DIS a todos os artigos com poucas operações vetorizadas.
+
+    Os ISSNs são normalizados uma única vez e usados em todas as junções com os índices.
+    """
+    chaves = normalizar_issns(artigos_df['ISSN'])
+    participantes = [quantificar_participantes(autores, referencias.participantes) for autores in artigos_df[COLUNA_AUTORES_DETALHE]]
+
+    # JCR e SJR do ano de publicação de cada artigo (ou do ano disponível mais próximo)
+    return pd.concat([
+        artigos_df.drop(columns=[COLUNA_AUTORES_DETALHE]),
+        classificar_qualis(chaves, referencias.indice_qualis).rename('Qualis'),
+        consultar_jcr(chaves, artigos_df['Ano'], referencias.metricas_jcr),
+        consultar_sjr(chaves, artigos_df['Ano'], referencias.metricas_sjr),
+        pd.DataFrame(participantes, index=artigos_df.index, columns=['DP', 'DC', 'DIS'])
+    ], axis=1)
+
+def limpar_artigos(artigos_df):
+    """Substitui os valores incompatíveis com JSON (NaN, inf, -inf) dos artigos por 0."""
+    return artigos_df.replace([float("inf"), -float("inf")], float("nan")).fillna(0)
+
+# Classificação de ISSNs avulsos
+LIMITE_ISSNS_CONSULTA = 50_000
+
+def classificar_issns(issns, ano, referencias):
+    """Classifica uma lista de ISSNs (Qualis, JCR e SJR) de uma vez, nos índices já carregados. Retorna o JSON (bytes)."""
+    chaves = normalizar_issns_consulta(issns)
+    resultado_df = pd.concat([
+        pd.DataFrame({'ISSN': pd.Series(issns, dtype=object)}),
+        classificar_qualis(chaves, referencias.indice_qualis).rename('Qualis'),
+        consultar_jcr(chaves, ano, referencias.metricas_jcr),
+        consultar_sjr(chaves, ano, referencias.metricas_sjr)
+    ], axis=1)
+    return montar_objeto_json({
+        "resultados": tabela_para_json(resultado_df),
+        "versaoReferencias": referencias.versao
+    })
+
+# Análise de um currículo, em blocos de artigos (a resposta JSON usa um bloco só)
+TAMANHO_BLOCO_NDJSON = int(os.getenv("TAMANHO_BLOCO_NDJSON", 25))
+SEM_ARTIGOS = {"message": "Nenhum artigo encontrado."}
+
+def analisar_curriculo_em_blocos(xml_fonte, referencias, tamanho_bloco=TAMANHO_BLOCO_NDJSON):
+    """Extrai e classifica os artigos em blocos, gerando as linhas NDJSON de cada bloco assim que ele fica pronto.
+
+    Os artigos saem na ordem em que aparecem no XML, a mesma da resposta
+    JSON. Ao terminar, o gerador retorna (campos do resultado, total de
+    artigos), com as tabelas já em JSON, ou a mensagem "Nenhum artigo
+    encontrado." se o XML não puder ser lido. Além das linhas geradas, só
+    Ano, Qualis e DP de cada artigo são guardados até o fim.
+    """
+    nome_pessoa = None
+    bloco, linhas, pontuados = [], [], []
+
+    def classificar(bloco):
+        artigos_df = enriquecer_artigos(pd.DataFrame(bloco), referencias)
+        pontuados.append(artigos_df[['Ano', 'Qualis', 'DP']])
+        linhas.append(tabela_para_ndjson(limpar_artigos(artigos_df)))
+        return linhas[-1]
+
+    try:
+        with xml_fonte:
+            for tag, registro in extrair_registros_lattes(xml_fonte):
+                if tag == 'ARTIGO-PUBLICADO':
+                    bloco.append(registro)
+                    if tamanho_bloco and len(bloco) >= tamanho_bloco:
+                        yield classificar(bloco)
+                        bloco = []
+                elif nome_pessoa is None:
+                    nome_pessoa = registro
+        if nome_pessoa is None:
+            raise ValueError("elemento DADOS-GERAIS não encontrado")
+        if bloco:
+            yield classificar(bloco)
+    except Exception as e:
+        print(f"Erro ao processar o XML: {e}")
+        return dict(SEM_ARTIGOS), 0
+    if not pontuados:
+        return dict(SEM_ARTIGOS), 0
+
+    pontuados = pd.concat(pontuados, ignore_index=True)
+    return {
+        "nomePessoa": nome_pessoa,
+        "artigos": ndjson_para_lista(linhas),
+        "pontuacaoQualis": tabela_para_json(calcular_pontuacao_qualis(pontuados))
+    }, len(pontuados)
+
+def analisar_curriculo(xml_fonte, referencias):
+    """Extrai, classifica e pontua os artigos de um currículo, retornando a resposta do /upload/ já em JSON (bytes)."""
+    blocos = analisar_curriculo_em_blocos(xml_fonte, referencias, tamanho_bloco=None)
+    while True:
+        try:
+            next(blocos)
+        except StopIteration as fim:
+            campos, _ = fim.value
+            return montar_objeto_json(campos)
+
+# Resposta em fluxo (NDJSON): um artigo por linha e, por último, o resumo
+def resumo_ndjson(campos, total_artigos, versao, resultado_id):
+    """Última linha da resposta NDJSON: nome, total de artigos e pontuação Qualis (ou a mensagem de erro)."""
+    if "artigos" not in campos:
+        return montar_objeto_json({**campos, "versaoReferencias": versao, "resultadoId": resultado_id}) + b"\n"
+    return montar_objeto_json({
+        "nomePessoa": campos["nomePessoa"],
+        "totalArtigos": total_artigos,
+        "pontuacaoQualis": campos["pontuacaoQualis"],
+        "versaoReferencias": versao,
+        "resultadoId": resultado_id
+    }) + b"\n"
+
+def transmitir_analise(xml_bytes, referencias, chave):
+    """Analisa um currículo em blocos para a resposta NDJSON e, ao final, guarda o resultado completo no cache.
+
+    A análise roda sempre no pool de threads, pois o gerador não atravessa processos.
+    """
+    campos, total_artigos = yield from analisar_curriculo_em_blocos(BytesIO(xml_bytes), referencias)
+    cache_resultados.guardar(chave, montar_objeto_json(campos))
+    yield resumo_ndjson(campos, total_artigos, referencias.versao, chave)
+
+def blocos_do_resultado(resultado_json, versao, resultado_id, tamanho_bloco=TAMANHO_BLOCO_NDJSON):
+    """Gera a resposta NDJSON de um resultado vindo do cache, no mesmo formato da análise em blocos."""
+    resultado = json.loads(resultado_json)
+    artigos = resultado.get("artigos", [])
+    for inicio in range(0, len(artigos), tamanho_bloco):
+        yield b"".join(montar_objeto_json(artigo) + b"\n" for artigo in artigos[inicio:inicio + tamanho_bloco])
+    yield resumo_ndjson(resultado, len(artigos), versao, resultado_id)
+
+async def transmitir_ndjson(blocos, analisando=True):
+    """Avança o gerador de blocos NDJSON no pool de threads e envia cada bloco assim que fica pronto.
+
+    Durante a análise, o semáforo das análises é tomado a cada bloco e
+    liberado antes do envio: um cliente lento não o mantém preso.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        async with app.state.limite_analises if analisando else nullcontext():
+            bloco = await loop.run_in_executor(app.state.pool_threads, next, blocos, None)
+        if bloco is None:
+            break
+        yield bloco
+
+# Pool de processos da análise em lote. Os processos são iniciados com "spawn": um fork feito com as
+# threads do servidor em andamento (pool de threads, to_thread, trava do cache) poderia travar o filho.
+CONTEXTO_PROCESSOS = multiprocessing.get_context("spawn")
+_referencias_worker = None
+
+def inicializar_worker(referencias):
+    """Recebe, uma única vez por processo, as referências já carregadas e indexadas."""
+    global _referencias_worker
+    _referencias_worker = referencias
+
+def analisar_curriculo_no_worker(xml_bytes):
+    """Analisa um currículo dentro de um processo do pool."""
+    return analisar_curriculo(BytesIO(xml_bytes), _referencias_worker)
+
+@contextmanager
+def usar_pool_lote(referencias):
+    """Empresta o pool de processos da versão de referências informada, criando-o no primeiro uso.
+
+    Há um único pool por versão: as análises de um lote ou tarefa que começaram
+    antes de uma recarga continuam usando o pool da versão antiga, que só é
+    encerrado quando a última delas termina. Um pool quebrado (um processo
+    morto, por exemplo) é descartado e recriado no próximo uso.
+    """
+    pools = app.state.pools_lote
+    entrada = pools.get(referencias.versao)
+    if entrada is None:
+        pool = ProcessPoolExecutor(
+            max_workers=WORKERS_LOTE, mp_context=CONTEXTO_PROCESSOS, initializer=inicializar_worker, initargs=(referencias,)
+        )
+        entrada = pools[referencias.versao] = [pool, 0]
+    entrada[1] += 1
+    try:
+        yield entrada[0]
+    except BrokenProcessPool:
+        if pools.get(referencias.versao) is entrada:
+            del pools[referencias.versao]
+        raise
+    finally:
+        entrada[1] -= 1
+        if entrada[1] == 0 and pools.get(referencias.versao) is not entrada:
+            entrada[0].shutdown(wait=False)
+        encerrar_pools_antigos()
+
+def encerrar_pools_antigos():
+    """Encerra os pools de versões de referências substituídas que ninguém mais usa."""
+    atual = app.state.referencias.versao if app.state.referencias is not None else None
+    for versao, (pool, usos) in list(app.state.pools_lote.items()):
+        if versao != atual and usos == 0:
+            del app.state.pools_lote[versao]
+            pool.shutdown(wait=False)
+
+async def executar_analise(xml_bytes, referencias, modo=None):
+    """Analisa um currículo no pool de threads ou de processos, sem bloquear o event loop.
+
+    O semáforo limita quantas análises rodam ao mesmo tempo; as requisições
+    leves (CORS, /ready/, /generate-csv/) continuam sendo atendidas.
+    """
+    loop = asyncio.get_running_loop()
+    async with app.state.limite_analises:
+        if (modo or MODO_ANALISE) == "processo":
+            with usar_pool_lote(referencias) as pool:
+                return await loop.run_in_executor(pool, analisar_curriculo_no_worker, xml_bytes)
+        return await loop.run_in_executor(app.state.pool_threads, analisar_curriculo, BytesIO(xml_bytes), referencias)
+
+def ler_xml_enviado(nome_arquivo, contents):
+    """Lê os bytes do XML enviado (direto ou de dentro do ZIP). Retorna (bytes ou None, mensagem)."""
+    xml_fonte, msg = abrir_xml(nome_arquivo, contents)
+    if not xml_fonte:
+        return None, msg
+    with xml_fonte:
+        return xml_fonte.read(), msg
+
+def reunir_curriculos_lote(arquivos):
+    """Reúne os XMLs de todos os arquivos enviados, descartando currículos repetidos.
+
+    Retorna a lista de (nome, bytes do XML) e a lista de erros por arquivo.
+    """
+    curriculos, erros = [], []
+    vistos = {}
+    tamanho_total = 0
+    for nome_arquivo, contents in arquivos:
+        encontrados, erros_arquivo = listar_curriculos_lote(nome_arquivo, contents, LIMITE_TAMANHO_LOTE - tamanho_total)
+        erros.extend(erros_arquivo)
+        for nome, dados in encontrados:
+            digest = hashlib.sha256(dados).hexdigest()
+            if digest in vistos:
+                erros.append({"arquivo": nome, "message": f"Currículo repetido no lote (mesmo conteúdo de {vistos[digest]})."})
+                continue
+            tamanho_total += len(dados)
+            if tamanho_total > LIMITE_TAMANHO_LOTE:
+                erros.append({"arquivo": nome, "message": "O lote excede o tamanho máximo permitido."})
+                continue
+            vistos[digest] = nome
+            curriculos.append((nome, dados))
+    return curriculos, erros
+
+# Recarga das referências sem reiniciar o servidor (e alterações avulsas do cadastro, uma de cada vez,
+# sob app.state.trava_referencias)
+
+async def recarregar_referencias():
+    """Carrega a nova versão das referências em segundo plano e a troca de uma só vez.
+
+    As requisições em andamento terminam com a versão que capturaram no início;
+    as seguintes já usam a nova.
+    """
+    async with app.state.trava_referencias:
+        try:
+            novas = await asyncio.to_thread(carregar_referencias)
+        except Exception as e:
+            app.state.erro_recarga = str(e)
+            print(f"Erro ao recarregar os dados de referência: {e}")
+            return
+        app.state.erro_recarga = None
+        app.state.erro_referencias = None
+        trocar_referencias(novas)
+
+def trocar_referencias(novas):
+    """Passa a usar as novas referências (se a versão mudou) e descarta o que dependia das anteriores."""
+    if app.state.referencias is None or novas.versao != app.state.referencias.versao:
+        app.state.referencias = novas
+        encerrar_pools_antigos()
+        cache_resultados.limpar()
+        print(f"Dados de referência atualizados para a versão {novas.versao}.")
+
+async def alterar_participantes(alterar):
+    """Aplica uma alteração a uma cópia do cadastro de docentes/discentes, grava-a e troca as referências.
+
+    O cadastro em uso não é modificado: as análises em andamento terminam com
+    a versão que capturaram. Retorna o valor devolvido por `alterar`.
+    """
+    async with app.state.trava_referencias:
+        referencias = app.state.referencias
+        participantes = referencias.participantes.copiar()
+        resultado = alterar(participantes)
+        trocar_referencias(await asyncio.to_thread(atualizar_participantes, referencias, participantes))
+        return resultado
+
+def verificar_admin(token):
+    """Confere o token administrativo. Sem ADMIN_TOKEN configurado, nenhum token é aceito."""
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
 
 # Endpoints
+@app.get("/ready/")
+async def verificar_prontidao():
+    """Sonda de prontidão: só responde 200 depois que as referências foram carregadas."""
+    if app.state.referencias is not None:
+        return {"status": "pronto"}
+    if app.state.erro_referencias:
+        return JSONResponse(status_code=503, content={"status": "erro", "message": app.state.erro_referencias})
+    return JSONResponse(status_code=503, content={"status": "carregando"})
+
+@app.get("/admin/referencias/")
+async def status_referencias(x_admin_token: Optional[str] = Header(None)):
+    """Informa a versão das referências em uso e o andamento de uma recarga."""
+    if not verificar_admin(x_admin_token):
+        return JSONResponse(status_code=403, content={"message": "Token administrativo inválido."})
+    referencias = app.state.referencias
+    return {
+        "versaoReferencias": referencias.versao if referencias else None,
+        "recarregando": app.state.recarga is not None and not app.state.recarga.done(),
+        "erroRecarga": app.state.erro_recarga
+    }
+
+@app.post("/admin/participantes/")
+async def adicionar_participante(participante: Participante, x_admin_token: Optional[str] = Header(None)):
+    """Acrescenta um docente ou discente ao cadastro, sem regerar a planilha."""
+    if not verificar_admin(x_admin_token):
+        return JSONResponse(status_code=403, content={"message": "Token administrativo inválido."})
+    if app.state.referencias is None:
+        return referencias_indisponiveis()
+    if participante.categoria not in CATEGORIAS:
+        return JSONResponse(status_code=400, content={"message": f"Categoria inválida. Use {', '.join(CATEGORIAS)}."})
+    try:
+        await alterar_participantes(
+            lambda participantes: participantes.adicionar(participante.nome, participante.categoria, participante.idCnpq)
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=409, content={"message": str(e)})
+    return JSONResponse(status_code=201, content={
+        "message": "Participante adicionado.",
+        "versaoReferencias": app.state.referencias.versao
+    })
+
+@app.delete("/admin/participantes/")
+async def remover_participante(
+    identificador: str = Query(..., description="Nome completo ou ID CNPq"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Remove um docente ou discente do cadastro, sem regerar a planilha."""
+    if not verificar_admin(x_admin_token):
+        return JSONResponse(status_code=403, content={"message": "Token administrativo inválido."})
+    if app.state.referencias is None:
+        return referencias_indisponiveis()
+    if not app.state.referencias.participantes.localizar(identificador):
+        return JSONResponse(status_code=404, content={"message": "Participante não encontrado no cadastro."})
+    removidos = await alterar_participantes(lambda participantes: participantes.remover(identificador))
+    return {"message": "Participante removido.", "removidos": removidos, "versaoReferencias": app.state.referencias.versao}
+
+@app.post("/admin/referencias/recarregar/")
+async def iniciar_recarga_referencias(x_admin_token: Optional[str] = Header(None)):
+    """Recarrega os arquivos de ./data em segundo plano e troca as referências sem downtime."""
+    if not verificar_admin(x_admin_token):
+        return JSONResponse(status_code=403, content={"message": "Token administrativo inválido."})
+    if app.state.recarga is None or app.state.recarga.done():
+        app.state.recarga = asyncio.create_task(recarregar_referencias())
+    return JSONResponse(status_code=202, content={"message": "Recarga dos dados de referência em andamento."})
+
+# Análise de um envio e de um lote (usadas pelos endpoints síncronos e pelas tarefas)
+async def analisar_envio(nome_arquivo, contents, referencias, progresso=None):
+    """Analisa um currículo enviado (XML ou ZIP), reaproveitando o cache de resultados. Retorna o JSON (bytes)."""
+    # Verificar o tipo de arquivo (o XML é lido direto da memória, sem pasta temporária)
+    xml_bytes, msg = await asyncio.to_thread(ler_xml_enviado, nome_arquivo, contents)
+    if xml_bytes is None:
+        return montar_objeto_json({"message": msg})
+
+    resultado, chave = await analisar_xml_enviado(xml_bytes, referencias, progresso)
+    return acrescentar_campos(resultado, {"versaoReferencias": referencias.versao, "resultadoId": chave})
+
+async def analisar_xml_enviado(xml_bytes, referencias, progresso=None):
+    """Analisa o XML de um currículo, reaproveitando o cache de resultados. Retorna (JSON em bytes, resultadoId)."""
+    # Currículo idêntico já analisado com a mesma versão das referências
+    chave = await asyncio.to_thread(chave_resultado, xml_bytes, referencias.versao)
+    resultado = await asyncio.to_thread(cache_resultados.obter, chave)
+    if resultado is None:
+        if progresso:
+            progresso(0, 1)
+        resultado = await executar_analise(xml_bytes, referencias)
+        await asyncio.to_thread(cache_resultados.guardar, chave, resultado)
+    if progresso:
+        progresso(1, 1)
+    return resultado, chave
+
+async def analisar_lote(arquivos, referencias, progresso=None):
+    """Analisa, em paralelo, os currículos de uma lista de (nome, conteúdo) enviada. Retorna o JSON (bytes)."""
+    # Reunir os XMLs de todos os arquivos enviados (descompactação e hashes fora do event loop)
+    curriculos, erros = await asyncio.to_thread(reunir_curriculos_lote, arquivos)
+
+    # Reaproveitar os currículos já analisados e distribuir os demais entre os processos do pool
+    chaves = await asyncio.to_thread(lambda: [chave_resultado(dados, referencias.versao) for _, dados in curriculos])
+    resultados = await asyncio.to_thread(lambda: [cache_resultados.obter(chave) for chave in chaves])
+    pendentes = [i for i, resultado in enumerate(resultados) if resultado is None]
+    concluidos = len(curriculos) - len(pendentes)
+    if progresso:
+        progresso(concluidos, len(curriculos))
+
+    async def analisar_pendente(i):
+        nonlocal concluidos
+        try:
+            try:
+                resultado = await executar_analise(curriculos[i][1], referencias, modo="processo")
+            except BrokenProcessPool:
+                # Um processo do pool morreu (falta de memória, por exemplo): tenta de novo em um pool novo
+                resultado = await executar_analise(curriculos[i][1], referencias, modo="processo")
+        except Exception as e:
+            print(f"Erro ao analisar {curriculos[i][0]}: {e!r}")
+            erros.append({"arquivo": curriculos[i][0], "message": "Erro ao analisar o currículo."})
+        else:
+            resultados[i] = resultado
+            await asyncio.to_thread(cache_resultados.guardar, chaves[i], resultado)
+        concluidos += 1
+        if progresso:
+            progresso(concluidos, len(curriculos))
+
+    if pendentes:
+        await asyncio.gather(*[analisar_pendente(i) for i in pendentes])
+
+    # Só entram no relatório os currículos analisados; as falhas ficam em `erros`
+    analisados = [i for i, resultado in enumerate(resultados) if resultado is not None]
+    curriculos = [curriculos[i] for i in analisados]
+    chaves = [chaves[i] for i in analisados]
+    resultados = [resultados[i] for i in analisados]
+
+    # Relatório consolidado: a divisão por DP evita contar duas vezes o artigo de vários docentes
+    chave_lote = hashlib.sha256("\0".join(chaves).encode()).hexdigest()
+    resultado_lote = await asyncio.to_thread(consolidar_lote, curriculos, chaves, resultados, erros)
+    await asyncio.to_thread(cache_resultados.guardar, chave_lote, resultado_lote)  # Disponível para as exportações
+    return acrescentar_campos(resultado_lote, {"versaoReferencias": referencias.versao, "resultadoId": chave_lote})
+
+def consolidar_lote(curriculos, chaves, resultados, erros):
+    """Monta a resposta do lote com os resultados (JSON) de cada currículo e a pontuação do programa."""
+    colunas_pontuacao = ['Ano', 'Qualis', 'DP']
+    artigos_programa = pd.DataFrame(
+        [[artigo[coluna] for coluna in colunas_pontuacao] for resultado in resultados for artigo in json.loads(resultado).get("artigos", [])],
+        columns=colunas_pontuacao
+    )
+    pontuacao_programa = tabela_para_json(calcular_pontuacao_qualis(artigos_programa)) if len(artigos_programa) else []
+
+    return montar_objeto_json({
+        "curriculos": montar_lista_json([
+            acrescentar_campos(resultado, {"arquivo": nome, "resultadoId": chave})
+            for (nome, _), chave, resultado in zip(curriculos, chaves, resultados)
+        ]),
+        "erros": erros,
+        "totalArtigos": len(artigos_programa),
+        "pontuacaoQualis": pontuacao_programa
+    })
+
+def referencias_indisponiveis():
+    """Resposta padrão enquanto os dados de referência não foram carregados."""
+    return JSONResponse(status_code=503, content={"message": "Dados de referência ainda não carregados."})
+
+async def transmitir_envio(nome_arquivo, contents, referencias):
+    """Resposta em fluxo (NDJSON) de um currículo: um artigo por linha e, por último, a pontuação Qualis."""
+    xml_bytes, msg = await asyncio.to_thread(ler_xml_enviado, nome_arquivo, contents)
+    if xml_bytes is None:
+        return await resposta_json(montar_objeto_json({"message": msg}))
+
+    # Um currículo já analisado sai do cache; os demais são analisados e enviados bloco a bloco
+    chave = await asyncio.to_thread(chave_resultado, xml_bytes, referencias.versao)
+    resultado = await asyncio.to_thread(cache_resultados.obter, chave)
+    if resultado is not None:
+        blocos = transmitir_ndjson(blocos_do_resultado(resultado, referencias.versao, chave), analisando=False)
+    else:
+        blocos = transmitir_ndjson(transmitir_analise(xml_bytes, referencias, chave))
+    return StreamingResponse(blocos, media_type=MIDIA_NDJSON)
+
+DESCRICAO_FORMATO = "'json' (padrão), 'colunas' (arrays por coluna) ou 'ndjson' (um artigo por linha, em fluxo)"
+FORMATOS_UPLOAD = ("json", "colunas", "ndjson")
+
 @app.post("/upload/")
-async def processar_artigos(file: UploadFile = File(...)):
+async def processar_artigos(
+    file: UploadFile = File(...),
+    formato: Optional[str] = Query(None, description=DESCRICAO_FORMATO),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
     """Processa o XML com os artigos diretamente ou a partir de um arquivo ZIP."""
-    contents = await file.read()
-    
-    # Cria uma pasta temporária única para o upload
-    temp_folder = f"./temp/{uuid.uuid4()}"
-    os.makedirs(temp_folder, exist_ok=True)
+    # Referências compartilhadas, carregadas uma única vez na inicialização
+    referencias = app.state.referencias
+    if referencias is None:
+        return referencias_indisponiveis()
+    formato = escolher_formato(formato, accept, FORMATOS_UPLOAD)
+    if formato is None:
+        return formato_invalido(FORMATOS_UPLOAD)
+    if formato == "ndjson":
+        return await transmitir_envio(file.filename, await file.read(), referencias)
+    resultado = await analisar_envio(file.filename, await file.read(), referencias)
+    return await resposta_json(resultado, formato, accept_encoding)
+
+@app.post("/upload/lote/")
+async def processar_lote(
+    files: List[UploadFile] = File(...),
+    formato: Optional[str] = Query(None, description="'json' (padrão) ou 'colunas' (arrays por coluna)"),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """Analisa, em paralelo, vários currículos (XMLs, ZIPs ou um ZIP com vários currículos)."""
+    referencias = app.state.referencias
+    if referencias is None:
+        return referencias_indisponiveis()
+    formato = escolher_formato(formato, accept)
+    if formato is None:
+        return formato_invalido()
+    arquivos = [(file.filename, await file.read()) for file in files]
+    return await resposta_json(await analisar_lote(arquivos, referencias), formato, accept_encoding)
+
+# Tarefas: a requisição retorna o identificador imediatamente e a análise segue em segundo plano
+@app.post("/tarefas/upload/")
+async def criar_tarefa_upload(file: UploadFile = File(...)):
+    """Agenda a análise de um currículo e retorna o identificador da tarefa."""
+    referencias = app.state.referencias
+    if referencias is None:
+        return referencias_indisponiveis()
+    nome_arquivo, contents = file.filename, await file.read()
+    tarefa = tarefas.criar("upload", lambda t: analisar_envio(nome_arquivo, contents, referencias, t.atualizar_progresso))
+    return JSONResponse(status_code=202, content=tarefa.resumo())
+
+@app.post("/tarefas/lote/")
+async def criar_tarefa_lote(files: List[UploadFile] = File(...)):
+    """Agenda a análise de vários currículos e retorna o identificador da tarefa."""
+    referencias = app.state.referencias
+    if referencias is None:
+        return referencias_indisponiveis()
+    arquivos = [(file.filename, await file.read()) for file in files]
+    tarefa = tarefas.criar("lote", lambda t: analisar_lote(arquivos, referencias, t.atualizar_progresso))
+    return JSONResponse(status_code=202, content=tarefa.resumo())
 
+@app.get("/tarefas/{tarefa_id}/")
+async def consultar_tarefa(tarefa_id: str):
+    """Informa a situação e o progresso de uma tarefa."""
+    tarefa = tarefas.obter(tarefa_id)
+    if tarefa is None:
+        return JSONResponse(status_code=404, content={"message": "Tarefa não encontrada ou expirada."})
+    return tarefa.resumo()
+
+@app.get("/tarefas/{tarefa_id}/resultado/")
+async def resultado_tarefa(
+    tarefa_id: str,
+    formato: Optional[str] = Query(None, description="'json' (padrão) ou 'colunas' (arrays por coluna)"),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """Retorna o resultado de uma tarefa concluída (202 enquanto ela ainda está em andamento)."""
+    formato = escolher_formato(formato, accept)
+    if formato is None:
+        return formato_invalido()
+    tarefa = tarefas.obter(tarefa_id)
+    if tarefa is None:
+        return JSONResponse(status_code=404, content={"message": "Tarefa não encontrada ou expirada."})
+    if tarefa.status == ERRO:
+        return JSONResponse(status_code=500, content={"message": tarefa.erro})
+    if tarefa.status != CONCLUIDA:
+        return JSONResponse(status_code=202, content=tarefa.resumo())
+    return await resposta_json(tarefa.resultado, formato, accept_encoding)
+
+@app.post("/issns/")
+async def consultar_issns(
+    consulta: ConsultaISSNs,
+    formato: Optional[str] = Query(None, description="'json' (padrão) ou 'colunas' (arrays por coluna)"),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """Retorna Qualis, JIF/quartil e SJR/quartil de uma lista de ISSNs, sem enviar as planilhas de referência."""
+    referencias = app.state.referencias
+    if referencias is None:
+        return referencias_indisponiveis()
+    formato = escolher_formato(formato, accept)
+    if formato is None:
+        return formato_invalido()
+    if len(consulta.issns) > LIMITE_ISSNS_CONSULTA:
+        return JSONResponse(status_code=413, content={"message": f"Envie no máximo {LIMITE_ISSNS_CONSULTA} ISSNs por consulta."})
+    resultado = await asyncio.to_thread(classificar_issns, consulta.issns, consulta.ano, referencias)
+    return await resposta_json(resultado, formato, accept_encoding)
+
+# Datasets: a planilha é enviada e indexada uma vez; as consultas usam o identificador
+@app.post("/datasets/")
+async def registrar_dataset(
+    file: UploadFile = File(...),
+    tipo: str = Form(..., description="'qualis', 'jcr' ou 'sjr'"),
+    ano: Optional[int] = Form(None, description="Ano do SJR (se não estiver no nome do arquivo)")
+):
+    """Registra uma planilha Qualis, JCR ou SJR e retorna o identificador para as consultas."""
+    if tipo not in TIPOS:
+        return JSONResponse(status_code=400, content={"message": "Tipo inválido. Use 'qualis', 'jcr' ou 'sjr'."})
+    contents = await file.read()
+    if len(contents) > LIMITE_TAMANHO_DATASET:
+        return JSONResponse(status_code=413, content={"message": "A planilha excede o tamanho máximo permitido."})
     try:
-        # Verificar o tipo de arquivo
-        if file.filename.endswith(".zip"):
-            xml_path, msg = processar_zip(contents, temp_folder)
-            if not xml_path:
-                return {"message": msg}
-        elif file.filename.endswith(".xml"):
-            # Grava o XML diretamente na pasta temporária
-            xml_path = os.path.join(temp_folder, "uploaded.xml")
-            with open(xml_path, "wb") as f:
-                f.write(contents)
-            msg = "Arquivo XML carregado diretamente."
-        else:
-            return {"message": "Formato de arquivo não suportado. Envie um arquivo .zip ou .xml."}
-
-        # Processar o XML extraído ou carregado
-        nome_pessoa, artigos_df = processar_xml(xml_path)
-        if artigos_df.empty:
-            return {"message": "Nenhum artigo encontrado."}
-
-        # Carregar arquivos fixos
-        qualis_file = './data/Classificação Qualis 2017_2020.csv'
-        jcr_file = './data/JCR tabelado.xlsx'
-        sjr_file = './data/scimagojr 2023.csv'
-        docentes_discentes_file = './data/docentes_discentes_formatados.xlsx'
-
-        qualis_df = pd.read_csv(qualis_file, delimiter=',')
-        jcr_df = pd.read_excel(jcr_file, engine='openpyxl')
-        sjr_df = pd.read_csv(sjr_file, delimiter=';', on_bad_lines='skip', engine='python')
-        docentes_discentes_df = pd.read_excel(docentes_discentes_file, engine='openpyxl')
-
-        # Processar dados dos artigos
-        artigos_df['Qualis'] = artigos_df['ISSN'].apply(lambda x: buscar_qualis(x, qualis_df))
-        artigos_df[['2023 JIF', 'JIF Quartile']] = artigos_df['ISSN'].apply(lambda x: pd.Series(buscar_jcr(x, jcr_df)))
-        artigos_df[['SJR', 'SJR Best Quartile']] = artigos_df['ISSN'].apply(lambda x: pd.Series(buscar_sjr(x, sjr_df)))
-        artigos_df[['DP', 'DC', 'DIS']] = artigos_df['Autores'].apply(lambda x: pd.Series(quantificar_participantes(x, docentes_discentes_df)))
-
-        # Calcular pontuação Qualis
-        pontuacao_qualis = calcular_pontuacao_qualis(artigos_df)
-        
-        # Limpar valores incompatíveis com JSON
-        artigos_df = artigos_df.replace([float("inf"), -float("inf")], float("nan")).fillna(0)
-        pontuacao_qualis = sanitize_float_values(pontuacao_qualis)
-
-        # Retornar resultados
-        return {
-            "nomePessoa": nome_pessoa,
-            "artigos": artigos_df.to_dict(orient="records"),
-            "pontuacaoQualis": pontuacao_qualis
-        }
-    finally:
-        # Remove a pasta temporária após o processamento
-        shutil.rmtree(temp_folder)
+        dataset, novo = await asyncio.to_thread(datasets.registrar, tipo, file.filename, contents, ano)
+    except Exception as e:
+        return JSONResponse(status_code=400, content={"message": f"Erro ao processar a planilha: {e}"})
+    return JSONResponse(status_code=201 if novo else 200, content={**dataset.resumo(), "novo": novo})
+
+@app.get("/datasets/")
+async def listar_datasets():
+    """Lista os datasets registrados (do menos para o mais usado recentemente)."""
+    return {"datasets": datasets.listar()}
+
+@app.delete("/datasets/{dataset_id}/")
+async def remover_dataset(dataset_id: str):
+    """Remove um dataset registrado."""
+    if not datasets.remover(dataset_id):
+        return JSONResponse(status_code=404, content={"message": "Dataset não encontrado ou descartado."})
+    return {"message": "Dataset removido."}
+
+@app.post("/datasets/{dataset_id}/issns/")
+async def consultar_issns_dataset(
+    dataset_id: str,
+    consulta: ConsultaISSNs,
+    formato: Optional[str] = Query(None, description="'json' (padrão) ou 'colunas' (arrays por coluna)"),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """Classifica uma lista de ISSNs com a planilha de um dataset registrado."""
+    formato = escolher_formato(formato, accept)
+    if formato is None:
+        return formato_invalido()
+    dataset = datasets.obter(dataset_id)
+    if dataset is None:
+        return JSONResponse(status_code=404, content={"message": "Dataset não encontrado ou descartado. Registre a planilha novamente."})
+    if len(consulta.issns) > LIMITE_ISSNS_CONSULTA:
+        return JSONResponse(status_code=413, content={"message": f"Envie no máximo {LIMITE_ISSNS_CONSULTA} ISSNs por consulta."})
+    resultado = await asyncio.to_thread(
+        lambda: montar_objeto_json({
+            "resultados": tabela_para_json(classificar_issns_dataset(dataset, consulta.issns)),
+            "datasetId": dataset.id
+        })
+    )
+    return await resposta_json(resultado, formato, accept_encoding)
+
+# Exportações de um resultado guardado (cache de resultados ou tarefa concluída)
+def obter_resultado(resultado_id):
+    """Retorna o JSON (bytes) de um resultado pelo resultadoId do /upload/ e do lote ou pelo id de uma tarefa."""
+    tarefa = tarefas.obter(resultado_id)
+    if tarefa is not None:
+        return tarefa.resultado if tarefa.status == CONCLUIDA else None
+    return cache_resultados.obter(resultado_id)
+
+async def carregar_resultado_exportacao(resultado_id):
+    """Retorna (resultado, None) ou (None, resposta de erro) para as exportações."""
+    resultado_json = await asyncio.to_thread(obter_resultado, resultado_id)
+    if resultado_json is None:
+        return None, JSONResponse(status_code=404, content={"message": "Resultado não encontrado ou expirado. Envie o currículo novamente."})
+    resultado = await asyncio.to_thread(ler_resultado, resultado_json)
+    if resultado is None:
+        return None, JSONResponse(status_code=404, content={"message": "O resultado não tem artigos para exportar."})
+    return resultado, None
+
+@app.get("/resultados/{resultado_id}/csv/")
+async def exportar_csv(
+    resultado_id: str,
+    tabela: str = Query("pontuacao", description="'pontuacao' (Tabela 2, padrão) ou 'artigos'")
+):
+    """Exporta, em fluxo e linha a linha, a pontuação Qualis ou os artigos de um resultado em CSV."""
+    if tabela not in TABELAS:
+        return JSONResponse(status_code=400, content={"message": "Tabela inválida. Use 'pontuacao' ou 'artigos'."})
+    resultado, erro = await carregar_resultado_exportacao(resultado_id)
+    if erro:
+        return erro
+    # Localiza o primeiro registro (e as colunas) fora do event loop; as linhas seguintes são lidas no envio
+    colunas, linhas = await asyncio.to_thread(tabela_artigos if tabela == "artigos" else tabela_pontuacao, resultado)
+    sufixo = "_artigos" if tabela == "artigos" else ""
+    return StreamingResponse(
+        gerar_csv(colunas, linhas),
+        media_type="text/csv",
+        headers=cabecalho_download(f"{nome_base_exportacao(resultado, resultado_id)}{sufixo}.csv")
+    )
+
+@app.get("/resultados/{resultado_id}/xlsx/")
+async def exportar_xlsx(resultado_id: str):
+    """Exporta os artigos e a pontuação Qualis de um resultado em XLSX (uma aba para cada)."""
+    resultado, erro = await carregar_resultado_exportacao(resultado_id)
+    if erro:
+        return erro
+
+    def gerar():
+        arquivo = tempfile.TemporaryFile()
+        try:
+            gravar_xlsx(resultado, arquivo)
+        except Exception:
+            arquivo.close()
+            raise
+        return arquivo
+
+    arquivo = await asyncio.to_thread(gerar)
+    return StreamingResponse(
+        ler_em_blocos(arquivo),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers=cabecalho_download(f"{nome_base_exportacao(resultado, resultado_id)}.xlsx")
+    )
 
 @app.post("/generate-csv/")
 async def generate_csv(
@@ -0,0 +1,271 @@
+"""Identificação de docentes e discentes entre os autores dos artigos.
+
+O cadastro de docentes/discentes é compilado uma única vez. Cada autor é
+resolvido, nesta ordem:
+
+1. pelo número de identificação CNPq (`NRO-ID-CNPQ`), quando o cadastro
+   traz a coluna opcional `ID CNPq`;
+2. pela igualdade exata do nome completo ou de um dos nomes de citação
+   (`NOME-PARA-CITACAO`) com uma variante de nome do cadastro. Citações só
+   com iniciais ("SANTOS, E. M.") são ignoradas aqui, pois coincidem com
+   pessoas diferentes com frequência;
+3. pela busca de substring original: todas as variantes (`Nome Completo`,
+   `APA`, `ABNT` e `Custom`) são transliteradas e concatenadas, na ordem do
+   cadastro, em um único texto de busca, e o autor é localizado com uma
+   única busca feita em C.
+
+O cadastro compilado pode ser gravado em disco (`salvar_cadastro`) e
+carregado direto pelo serviço de análise, sem reler a planilha; pessoas
+avulsas são acrescentadas ou removidas sem recompilar o cadastro inteiro.
+"""
+import bisect
+import copy
+import os
+import pickle
+
+import pandas as pd
+import unidecode
+
+COLUNAS_NOMES = ['Nome Completo', 'APA', 'ABNT', 'Custom']
+COLUNA_ID_CNPQ = 'ID CNPq'  # Coluna opcional do cadastro
+
+# Caractere que nunca aparece em nomes: impede que uma busca atravesse duas variantes
+SEPARADOR = '\x00'
+
+# Limite de nomes de autores memorizados por índice
+LIMITE_CACHE = 50_000
+
+# Cadastro compilado gravado em disco (carregado direto pelo serviço de análise)
+ARQUIVO_CADASTRO = 'docentes_discentes.cadastro.pkl'
+VERSAO_CADASTRO = 2  # Incrementar quando o formato do IndiceParticipantes mudar
+
+CATEGORIAS = ('DP', 'DC', 'DISC')
+
+# Lista de preposições a serem ignoradas
+preposicoes = {"de", "do", "da", "dos", "das"}
+
+
+def formatar_nome_autor(nome: str) -> dict:
+    """
+    Formata o nome do autor em múltiplos estilos: APA, ABNT e customizado.
+    Exemplo: "Antonio Acacio de Melo Neto" -> "Melo Neto, A. A."
+    """
+    partes = nome.split()
+    nome_principal = [parte for parte in partes[:-1] if parte.lower() not in preposicoes]  # Ignorar preposições
+    sobrenome = partes[-1]  # Última parte é o sobrenome ou sufixo importante (Neto, Filho)
+
+    # Verificar se há sufixos como "Neto", "Filho" que devem ser mantidos juntos
+    if len(partes) > 1 and partes[-2].lower() not in preposicoes:
+        sobrenome = f"{partes[-2]} {sobrenome}"
+
+    # Construir as iniciais dos nomes
+    iniciais = " ".join([p[0].upper() + "." for p in nome_principal])
+
+    # Formatar nos diferentes estilos
+    apa = f"{sobrenome}, {iniciais}"
+    abnt = f"{sobrenome.upper()}, {' '.join(nome_principal).title()}"
+    custom = f"{iniciais} {sobrenome.title()}"
+
+    return {"APA": apa, "ABNT": abnt, "Custom": custom}
+
+def normalizar_autor(autor: str) -> str:
+    """Normaliza o nome de um autor do artigo (sem espaços nas bordas, minúsculo e sem acentos)."""
+    return unidecode.unidecode(autor.strip().lower())
+
+def normalizar_variante(nome) -> str:
+    """Normaliza uma variante de nome do cadastro (minúscula e sem acentos)."""
+    return unidecode.unidecode(nome.lower()) if isinstance(nome, str) else ''
+
+
+def citacao_completa(citacao: str) -> bool:
+    """Indica se o nome de citação traz ao menos um prenome por extenso (e não só iniciais)."""
+    prenomes = citacao.split(',', 1)[-1]
+    return any(len(parte) > 2 for parte in prenomes.replace('.', ' ').split())
+
+
+class IndiceParticipantes:
+    """Cadastro de docentes/discentes compilado para identificar autores rapidamente.
+
+    Pessoas podem ser acrescentadas ou removidas uma a uma, sem recompilar o
+    cadastro: a nova pessoa entra no fim do texto de busca, e o trecho de uma
+    pessoa removida é apagado (preenchido com o separador), mantendo as
+    posições das demais.
+    """
+
+    def __init__(self, docentes_discentes_df: pd.DataFrame):
+        self.categorias = []
+        self._pessoas = []  # (variantes, ID CNPq) de cada posição; None para pessoas removidas
+        self._inicios = []
+        self._por_nome = {}  # Variante normalizada -> posições das pessoas com essa variante
+        self._por_id = {}  # ID CNPq -> posições das pessoas com esse ID
+        self._cache = {}
+        colunas = [docentes_discentes_df[coluna].tolist() for coluna in COLUNAS_NOMES]
+        if COLUNA_ID_CNPQ in docentes_discentes_df:
+            ids = docentes_discentes_df[COLUNA_ID_CNPQ].tolist()
+        else:
+            ids = [None] * len(docentes_discentes_df)
+        partes = []
+        tamanho = 0
+        for variantes, categoria, id_cnpq in zip(zip(*colunas), docentes_discentes_df['Categoria'].tolist(), ids):
+            trecho = self._registrar(variantes, categoria, id_cnpq, tamanho)
+            partes.append(trecho)
+            tamanho += len(trecho)
+        self._texto = ''.join(partes)
+
+    def _registrar(self, variantes: tuple, categoria: str, id_cnpq, inicio: int) -> str:
+        """Registra uma pessoa nos índices exatos e retorna o seu trecho do texto de busca."""
+        indice = len(self._pessoas)
+        id_cnpq = id_cnpq.strip() if isinstance(id_cnpq, str) and id_cnpq.strip() else None
+        self._pessoas.append((tuple(variantes), id_cnpq))
+        self.categorias.append(categoria)
+        self._inicios.append(inicio)
+        for chave in self._chaves_nome(variantes):
+            posicoes = self._por_nome.setdefault(chave, [])
+            if indice not in posicoes:
+                posicoes.append(indice)
+        if id_cnpq:
+            self._por_id.setdefault(id_cnpq, []).append(indice)
+        return SEPARADOR.join(normalizar_variante(v) for v in variantes) + SEPARADOR
+
+    @staticmethod
+    def _chaves_nome(variantes) -> list:
+        return [normalizar_autor(variante) for variante in variantes if isinstance(variante, str) and variante.strip()]
+
+    def __len__(self) -> int:
+        return sum(pessoa is not None for pessoa in self._pessoas)
+
+    def localizar(self, identificador: str) -> list:
+        """Posições das pessoas com esse nome completo ou ID CNPq."""
+        identificador = identificador.strip()
+        if identificador in self._por_id:
+            return list(self._por_id[identificador])
+        nome = normalizar_autor(identificador)
+        return [posicao for posicao in self._por_nome.get(nome, [])
+                if normalizar_autor(self._pessoas[posicao][0][0]) == nome]
+
+    def adicionar(self, nome: str, categoria: str, id_cnpq: str = None) -> int:
+        """Acrescenta uma pessoa (variantes de nome geradas a partir do nome completo). Retorna a sua posição."""
+        nome = ' '.join(nome.split())
+        if not nome:
+            raise ValueError("Informe o nome completo.")
+        if categoria not in CATEGORIAS:
+            raise ValueError(f"Categoria inválida. Use {', '.join(CATEGORIAS)}.")
+        if self.localizar(nome) or (id_cnpq and self.localizar(id_cnpq)):
+            raise ValueError(f"{nome} já está no cadastro.")
+        formatado = formatar_nome_autor(nome)
+        variantes = (nome, formatado["APA"], formatado["ABNT"], formatado["Custom"])
+        self._texto += self._registrar(variantes, categoria, id_cnpq, len(self._texto))
+        self._cache.clear()
+        return len(self._pessoas) - 1
+
+    def remover(self, identificador: str) -> int:
+        """Remove as pessoas com esse nome completo ou ID CNPq. Retorna quantas foram removidas."""
+        posicoes = self.localizar(identificador)
+        for posicao in posicoes:
+            variantes, id_cnpq = self._pessoas[posicao]
+            for chave in self._chaves_nome(variantes):
+                self._por_nome[chave].remove(posicao)
+                if not self._por_nome[chave]:
+                    del self._por_nome[chave]
+            if id_cnpq:
+                self._por_id[id_cnpq].remove(posicao)
+                if not self._por_id[id_cnpq]:
+                    del self._por_id[id_cnpq]
+            inicio = self._inicios[posicao]
+            fim = self._inicios[posicao + 1] if posicao + 1 < len(self._inicios) else len(self._texto)
+            self._texto = self._texto[:inicio] + SEPARADOR * (fim - inicio) + self._texto[fim:]
+            self._pessoas[posicao] = None
+            self.categorias[posicao] = None
+        if posicoes:
+            self._cache.clear()
+        return len(posicoes)
+
+    def copiar(self) -> "IndiceParticipantes":
+        """Cópia independente, para alterar o cadastro sem afetar as análises em andamento."""
+        novo = copy.deepcopy(self)
+        novo._cache = {}
+        return novo
+
+    def tabela(self) -> pd.DataFrame:
+        """Pessoas do cadastro no formato da planilha de docentes/discentes formatados."""
+        registros = []
+        for pessoa, categoria in zip(self._pessoas, self.categorias):
+            if pessoa is not None:
+                variantes, id_cnpq = pessoa
+                registros.append({**dict(zip(COLUNAS_NOMES, variantes)), 'Categoria': categoria, COLUNA_ID_CNPQ: id_cnpq})
+        tabela = pd.DataFrame(registros, columns=['Nome Completo', 'Categoria', 'APA', 'ABNT', 'Custom', COLUNA_ID_CNPQ])
+        return tabela if tabela[COLUNA_ID_CNPQ].notna().any() else tabela.drop(columns=COLUNA_ID_CNPQ)
+
+    def buscar(self, autor_normalizado: str):
+        """Retorna a posição da primeira pessoa do cadastro cujo nome contém o autor, ou None."""
+        if autor_normalizado in self._cache:
+            return self._cache[autor_normalizado]
+        encontrado = self._texto.find(autor_normalizado)
+        posicao = bisect.bisect_right(self._inicios, encontrado) - 1 if encontrado >= 0 and self._inicios else None
+        if len(self._cache) >= LIMITE_CACHE:
+            self._cache.clear()
+        self._cache[autor_normalizado] = posicao
+        return posicao
+
+    def identificar(self, autor: dict):
+        """Retorna a posição no cadastro de um autor estruturado ({'nome', 'citacao', 'id_cnpq'}), ou None."""
+        id_cnpq = (autor.get('id_cnpq') or '').strip()
+        if id_cnpq in self._por_id:
+            return self._por_id[id_cnpq][0]
+        nome = normalizar_autor(autor['nome'])
+        posicoes = self._por_nome.get(nome)
+        if posicoes and len(posicoes) == 1:
+            return posicoes[0]
+        for citacao in (autor.get('citacao') or '').split(';'):
+            if citacao_completa(citacao):
+                posicoes = self._por_nome.get(normalizar_autor(citacao))
+                if posicoes and len(posicoes) == 1:
+                    return posicoes[0]
+        return self.buscar(nome)
+
+    def categoria(self, autor):
+        """Retorna a categoria (DP, DC, DISC...) do autor, ou None se ele não estiver no cadastro."""
+        posicao = self.identificar(autor if isinstance(autor, dict) else {'nome': autor})
+        return self.categorias[posicao] if posicao is not None else None
+
+    def quantificar(self, autores) -> tuple:
+        """Conta DP, DC e DIS entre os autores (lista de autores estruturados ou texto separado por ';')."""
+        if isinstance(autores, str):
+            autores = autores.split(';')
+        dp_count, dc_count, dis_count = 0, 0, 0
+        for autor in autores:
+            categoria = self.categoria(autor)
+            if categoria is None:
+                continue
+            if categoria == 'DP':
+                dp_count += 1
+            elif categoria == 'DC':
+                dc_count += 1
+            else:
+                dis_count += 1
+        return dp_count, dc_count, dis_count
+
+
+# Cadastro compilado em disco
+def salvar_cadastro(participantes: IndiceParticipantes, caminho: str, hash_planilha: str = None):
+    """Grava o cadastro compilado (troca atômica do arquivo).
+
+    `hash_planilha` é o hash da planilha de docentes/discentes existente quando
+    o cadastro foi gerado: se a planilha for trocada depois, ela volta a valer.
+    """
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    cadastro = {'versao': VERSAO_CADASTRO, 'participantes': participantes, 'planilha': hash_planilha}
+    with open(temporario, 'wb') as f:
+        pickle.dump(cadastro, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, caminho)
+
+def carregar_cadastro(caminho: str):
+    """Lê o cadastro compilado. Retorna (cadastro, hash da planilha de origem).
+
+    Lança ValueError se ele foi gravado em outro formato.
+    """
+    with open(caminho, 'rb') as f:
+        cadastro = pickle.load(f)
+    if not isinstance(cadastro, dict) or cadastro.get('versao') != VERSAO_CADASTRO:
+        raise ValueError(f"Cadastro {os.path.basename(caminho)} em formato antigo; gere-o novamente.")
+    return cadastro['participantes'], cadastro['planilha']
@@ -0,0 +1,225 @@
+"""Registro dos dados de referência (Qualis, JCR, SJR e docentes/discentes).
+
+As tabelas são lidas e normalizadas uma única vez por processo e depois
+compartilhadas, somente para leitura, entre todas as requisições.
+
+Cada fonte compilada (o índice pronto para consulta) é gravada em um snapshot
+binário em `data/.snapshots`, identificado pelo hash do arquivo de origem.
+As cargas seguintes leem o snapshot em vez da planilha/CSV, e um novo
+snapshot só é gerado quando a origem muda. Para gerar os snapshots
+antecipadamente (por exemplo, no build):
+
+    python referencias.py
+
+O cadastro de docentes/discentes compilado (`docentes_discentes.cadastro.pkl`,
+gerado por extrair_docentes_discentes.py ou pelas alterações avulsas do
+cadastro) é carregado direto, sem snapshot, enquanto a planilha de
+docentes/discentes for a mesma de quando ele foi gerado. Se a planilha for
+trocada, ou se o cadastro compilado não puder ser lido, a planilha volta a
+valer e o cadastro compilado é ignorado.
+"""
+import glob
+import hashlib
+import os
+import pickle
+import re
+from dataclasses import dataclass, replace
+
+import pandas as pd
+
+from indices import MetricasPorAno, coluna_jif, construir_indice_jcr, construir_indice_qualis, construir_indice_sjr
+from participantes import ARQUIVO_CADASTRO, COLUNA_ID_CNPQ, IndiceParticipantes, carregar_cadastro, salvar_cadastro
+
+# Arquivos fixos de referência
+PASTA_DADOS = './data'
+ARQUIVO_QUALIS = 'Classificação Qualis 2017_2020.csv'
+PADRAO_JCR = 'JCR tabelado*.xlsx'   # Um arquivo por ano; o ano vem da coluna '<ano> JIF'
+PADRAO_SJR = 'scimagojr *.csv'      # Um arquivo por ano; o ano vem do nome do arquivo
+ARQUIVO_DOCENTES_DISCENTES = 'docentes_discentes_formatados.xlsx'
+
+# Snapshots binários das fontes compiladas
+PASTA_SNAPSHOTS = '.snapshots'
+VERSAO_SNAPSHOT = 5  # Incrementar quando o formato ou as regras dos índices compilados mudarem
+
+
+# Funções de carga de cada tabela (já com os ISSNs normalizados)
+def carregar_qualis(caminho: str) -> pd.DataFrame:
+    """Lê a tabela Qualis e normaliza a coluna ISSN."""
+    qualis_df = pd.read_csv(caminho, delimiter=',')
+    qualis_df['ISSN'] = qualis_df['ISSN'].str.replace("-", "").str.strip()
+    return qualis_df
+
+def carregar_jcr(caminho: str) -> pd.DataFrame:
+    """Lê a tabela JCR e normaliza as colunas ISSN e eISSN."""
+    jcr_df = pd.read_excel(caminho, engine='openpyxl')
+    jcr_df['ISSN'] = jcr_df['ISSN'].str.replace("-", "").str.strip()
+    jcr_df['eISSN'] = jcr_df['eISSN'].str.replace("-", "").str.strip()
+    return jcr_df
+
+def carregar_sjr(caminho: str) -> pd.DataFrame:
+    """Lê a tabela SJR (o campo Issn é expandido no índice invertido)."""
+    return pd.read_csv(caminho, delimiter=';', on_bad_lines='skip', engine='python')
+
+def carregar_docentes_discentes(caminho: str) -> pd.DataFrame:
+    """Lê a planilha de docentes e discentes formatados (o ID CNPq, se houver, é lido como texto)."""
+    return pd.read_excel(caminho, engine='openpyxl', dtype={COLUNA_ID_CNPQ: str})
+
+
+# Compilação de cada fonte: índice pronto para consulta
+def compilar_qualis(caminho: str):
+    return construir_indice_qualis(carregar_qualis(caminho))
+
+def compilar_jcr(caminho: str):
+    jcr_df = carregar_jcr(caminho)
+    _, ano = coluna_jif(jcr_df)
+    return ano, construir_indice_jcr(jcr_df)
+
+def compilar_sjr(caminho: str):
+    return ano_do_arquivo(caminho), construir_indice_sjr(carregar_sjr(caminho))
+
+def ano_do_arquivo(caminho: str) -> int:
+    """Extrai o ano do nome do arquivo (ex.: 'scimagojr 2023.csv' -> 2023)."""
+    encontrado = re.search(r'(\d{4})', os.path.basename(caminho))
+    if not encontrado:
+        raise ValueError(f"Ano não encontrado no nome do arquivo {os.path.basename(caminho)}.")
+    return int(encontrado.group(1))
+
+def carregar_metricas(pasta: str, padrao: str, compilar, pasta_snapshots: str):
+    """Reúne os índices de todos os anos disponíveis de uma métrica em um único MetricasPorAno.
+
+    Retorna as métricas e os hashes dos arquivos de origem.
+    """
+    caminhos = sorted(glob.glob(os.path.join(glob.escape(pasta), padrao)))
+    if not caminhos:
+        raise FileNotFoundError(f"Nenhum arquivo '{padrao}' encontrado em {pasta}.")
+    indices_por_ano, hashes = {}, []
+    for caminho in caminhos:
+        (ano, indice), digest = carregar_fonte(caminho, compilar, pasta_snapshots)
+        if ano in indices_por_ano:
+            print(f"Ano {ano} repetido em {os.path.basename(caminho)}; mantido o primeiro arquivo.")
+        else:
+            indices_por_ano[ano] = indice
+        hashes.append(digest)
+    return MetricasPorAno(indices_por_ano), hashes
+
+def compilar_docentes_discentes(caminho: str):
+    return IndiceParticipantes(carregar_docentes_discentes(caminho))
+
+def carregar_participantes(pasta: str, pasta_snapshots: str):
+    """Carrega o cadastro compilado, se existir, for válido e a planilha não tiver mudado; senão, compila a planilha (via snapshot).
+
+    Retorna o cadastro, o hash do arquivo de origem e o hash da planilha (None se ela não existir).
+    """
+    caminho_cadastro = os.path.join(pasta, ARQUIVO_CADASTRO)
+    caminho_planilha = os.path.join(pasta, ARQUIVO_DOCENTES_DISCENTES)
+    hash_planilha = hash_arquivo(caminho_planilha) if os.path.exists(caminho_planilha) else None
+    if os.path.exists(caminho_cadastro):
+        try:
+            participantes, planilha_do_cadastro = carregar_cadastro(caminho_cadastro)
+        except Exception as e:
+            print(f"Cadastro compilado inválido, usando {ARQUIVO_DOCENTES_DISCENTES}: {e}")
+        else:
+            if hash_planilha is None or hash_planilha == planilha_do_cadastro:
+                return participantes, hash_arquivo(caminho_cadastro), hash_planilha
+            print(f"{ARQUIVO_DOCENTES_DISCENTES} mudou depois que {ARQUIVO_CADASTRO} foi gerado; "
+                  f"usando a planilha (as alterações avulsas do cadastro compilado foram descartadas).")
+    participantes, digest = carregar_fonte(caminho_planilha, compilar_docentes_discentes, pasta_snapshots)
+    return participantes, digest, hash_planilha
+
+# Snapshots
+def hash_arquivo(caminho: str) -> str:
+    """Hash do conteúdo de um arquivo de origem."""
+    hash_conteudo = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            hash_conteudo.update(bloco)
+    return hash_conteudo.hexdigest()
+
+def carregar_fonte(caminho: str, compilar, pasta_snapshots: str):
+    """Carrega uma fonte compilada do snapshot ou, se a origem mudou, compila e grava um novo.
+
+    Retorna a fonte compilada e o hash do arquivo de origem.
+    """
+    digest = hash_arquivo(caminho)
+    nome_base = os.path.basename(caminho)
+    snapshot = os.path.join(pasta_snapshots, f"{nome_base}.{digest[:16]}.v{VERSAO_SNAPSHOT}.pkl")
+
+    if os.path.exists(snapshot):
+        try:
+            with open(snapshot, 'rb') as f:
+                return pickle.load(f), digest
+        except Exception as e:
+            print(f"Snapshot inválido, recompilando {nome_base}: {e}")
+
+    compilado = compilar(caminho)
+    try:
+        os.makedirs(pasta_snapshots, exist_ok=True)
+        temporario = f"{snapshot}.{os.getpid()}.tmp"
+        with open(temporario, 'wb') as f:
+            pickle.dump(compilado, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, snapshot)
+        # Remove os snapshots antigos da mesma fonte
+        for arquivo in os.listdir(pasta_snapshots):
+            if arquivo.startswith(f"{nome_base}.") and arquivo.endswith(".pkl") and os.path.join(pasta_snapshots, arquivo) != snapshot:
+                os.remove(os.path.join(pasta_snapshots, arquivo))
+    except OSError as e:
+        print(f"Não foi possível gravar o snapshot de {nome_base}: {e}")
+    return compilado, digest
+
+def calcular_versao(hashes: list) -> str:
+    """Versão dos dados de referência: combinação dos hashes de todos os arquivos de origem e da versão dos índices.
+
+    Com a versão dos índices, uma mudança de regra também invalida os resultados guardados no cache.
+    """
+    return hashlib.sha256("\0".join([f"v{VERSAO_SNAPSHOT}", *hashes]).encode()).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class Referencias:
+    """Tabelas de referência carregadas, compartilhadas entre as requisições."""
+    versao: str
+    pasta: str
+    hashes: tuple  # Hashes dos arquivos de origem (o do cadastro de docentes/discentes por último)
+    hash_planilha_participantes: str  # Planilha de docentes/discentes de que o cadastro em uso deriva
+    indice_qualis: pd.Series
+    metricas_jcr: MetricasPorAno
+    metricas_sjr: MetricasPorAno
+    participantes: IndiceParticipantes
+
+
+def carregar_referencias(pasta: str = PASTA_DADOS) -> Referencias:
+    """Carrega e normaliza todas as tabelas de referência da pasta de dados (via snapshots)."""
+    pasta_snapshots = os.path.join(pasta, PASTA_SNAPSHOTS)
+    indice_qualis, hash_qualis = carregar_fonte(os.path.join(pasta, ARQUIVO_QUALIS), compilar_qualis, pasta_snapshots)
+    metricas_jcr, hashes_jcr = carregar_metricas(pasta, PADRAO_JCR, compilar_jcr, pasta_snapshots)
+    metricas_sjr, hashes_sjr = carregar_metricas(pasta, PADRAO_SJR, compilar_sjr, pasta_snapshots)
+    participantes, hash_docentes, hash_planilha = carregar_participantes(pasta, pasta_snapshots)
+    hashes = (hash_qualis, *hashes_jcr, *hashes_sjr, hash_docentes)
+    return Referencias(
+        versao=calcular_versao(hashes),
+        pasta=pasta,
+        hashes=hashes,
+        hash_planilha_participantes=hash_planilha,
+        indice_qualis=indice_qualis,
+        metricas_jcr=metricas_jcr,
+        metricas_sjr=metricas_sjr,
+        participantes=participantes,
+    )
+
+def atualizar_participantes(referencias: Referencias, participantes: IndiceParticipantes) -> Referencias:
+    """Grava o cadastro alterado na pasta de dados e retorna as referências com ele (e a nova versão)."""
+    caminho_cadastro = os.path.join(referencias.pasta, ARQUIVO_CADASTRO)
+    salvar_cadastro(participantes, caminho_cadastro, referencias.hash_planilha_participantes)
+    hashes = (*referencias.hashes[:-1], hash_arquivo(caminho_cadastro))
+    return replace(
+        referencias,
+        versao=calcular_versao(hashes),
+        hashes=hashes,
+        participantes=participantes,
+    )
+
+
+if __name__ == "__main__":
+    # Etapa de build: gera (ou confirma) os snapshots de todas as fontes
+    referencias = carregar_referencias()
+    print(f"Snapshots prontos em {os.path.join(PASTA_DADOS, PASTA_SNAPSHOTS)} (versão {referencias.versao}).")
@@ -1,4 +1,9 @@
+import multiprocessing
+
 import uvicorn
 
 if __name__ == "__main__":
+    # No executável (PyInstaller), os processos do pool de análise em lote reexecutam este
+    # ponto de entrada; freeze_support os desvia para o worker em vez de subir outro servidor
+    multiprocessing.freeze_support()
     uvicorn.run("main:app", host="127.0.0.1", port=8000)
@@ -0,0 +1,110 @@
+"""Serialização dos resultados da análise direto para JSON (bytes).
+
+As tabelas de artigos e de pontuação são convertidas pelo `DataFrame.to_json`,
+em C, sem passar por listas de dicionários; NaN, inf e -inf viram null na
+própria conversão. Os trechos já serializados são montados na resposta final
+sem nova codificação.
+
+O formato em colunas (opcional) envia cada tabela como a lista dos nomes das
+colunas mais um array de valores por coluna, sem repetir as chaves em cada
+artigo.
+"""
+import gzip
+import json
+
+import pandas as pd
+
+try:
+    import brotli  # Opcional: compressão "br" quando instalada
+except ImportError:
+    brotli = None
+
+# Maior precisão aceita pelo DataFrame.to_json
+PRECISAO_DECIMAL = 15
+
+# Campos do resultado que trazem tabelas (listas de registros)
+CAMPOS_TABELA = ("artigos", "pontuacaoQualis", "resultados")
+
+# Respostas menores que isso não compensam a compressão
+TAMANHO_MINIMO_COMPRESSAO = 1024
+NIVEL_GZIP = 6
+QUALIDADE_BROTLI = 5
+
+
+def tabela_para_json(df: pd.DataFrame) -> bytes:
+    """Converte uma tabela em uma lista JSON de registros."""
+    return df.to_json(orient="records", force_ascii=False, double_precision=PRECISAO_DECIMAL).encode("utf-8")
+
+def tabela_para_ndjson(df: pd.DataFrame) -> bytes:
+    """Converte uma tabela em registros JSON, um por linha (NDJSON)."""
+    return df.to_json(orient="records", lines=True, force_ascii=False, double_precision=PRECISAO_DECIMAL).encode("utf-8")
+
+def ndjson_para_lista(blocos: list) -> bytes:
+    """Junta blocos NDJSON em uma lista JSON, igual à do `tabela_para_json` da tabela inteira."""
+    registros = [bloco.rstrip(b"\n").replace(b"\n", b",") for bloco in blocos if bloco.strip()]
+    return b"[" + b",".join(registros) + b"]"
+
+def valor_para_json(valor) -> bytes:
+    """Serializa um valor comum ou mantém como está um trecho de JSON já serializado (bytes)."""
+    if isinstance(valor, bytes):
+        return valor
+    return json.dumps(valor, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def montar_objeto_json(campos: dict) -> bytes:
+    """Monta um objeto JSON a partir de valores comuns e de trechos já serializados (bytes)."""
+    return b"{" + b",".join(valor_para_json(chave) + b":" + valor_para_json(valor) for chave, valor in campos.items()) + b"}"
+
+def montar_lista_json(itens: list) -> bytes:
+    """Monta uma lista JSON a partir de valores comuns e de trechos já serializados (bytes)."""
+    return b"[" + b",".join(valor_para_json(item) for item in itens) + b"]"
+
+def acrescentar_campos(objeto_json: bytes, campos: dict) -> bytes:
+    """Acrescenta campos ao fim de um objeto JSON já serializado, sem decodificá-lo."""
+    extras = montar_objeto_json(campos)
+    if objeto_json.rstrip() == b"{}":
+        return extras
+    return objeto_json.rstrip()[:-1] + b"," + extras[1:]
+
+# Formato em colunas
+def registros_para_colunas(registros: list) -> dict:
+    """Converte uma lista de registros em {"colunas": [...], "valores": [um array por coluna]}."""
+    colunas = list(registros[0]) if registros else []
+    return {"colunas": colunas, "valores": [[registro.get(coluna) for registro in registros] for coluna in colunas]}
+
+def converter_para_colunas(resultado_json: bytes) -> bytes:
+    """Converte um resultado (de um currículo ou de um lote) para o formato em colunas."""
+    def converter(objeto):
+        for campo in CAMPOS_TABELA:
+            if isinstance(objeto.get(campo), list):
+                objeto[campo] = registros_para_colunas(objeto[campo])
+        for curriculo in objeto.get("curriculos", []):
+            converter(curriculo)
+        return objeto
+    return valor_para_json(converter(json.loads(resultado_json)))
+
+# Compressão
+def negociar_compressao(accept_encoding: str):
+    """Escolhe a compressão ("br", "gzip" ou None) a partir do cabeçalho Accept-Encoding."""
+    aceitas = {}
+    for item in (accept_encoding or "").split(","):
+        nome, _, parametros = item.strip().partition(";")
+        qualidade = 1.0
+        if parametros.strip().startswith("q="):
+            try:
+                qualidade = float(parametros.strip()[2:])
+            except ValueError:
+                qualidade = 0.0
+        if nome:
+            aceitas[nome.strip().lower()] = qualidade
+    for codificacao in ("br", "gzip"):
+        if codificacao == "br" and brotli is None:
+            continue
+        if aceitas.get(codificacao, aceitas.get("*", 0)) > 0:
+            return codificacao
+    return None
+
+def comprimir(conteudo: bytes, codificacao: str) -> bytes:
+    """Comprime o conteúdo com a codificação negociada."""
+    if codificacao == "br":
+        return brotli.compress(conteudo, quality=QUALIDADE_BROTLI)
+    return gzip.compress(conteudo, compresslevel=NIVEL_GZIP)
@@ -0,0 +1,92 @@
+"""Tarefas de análise em segundo plano, consultadas por identificador.
+
+Uma tarefa é criada com o envio, roda sem prender a requisição e guarda o
+resultado por um tempo configurável (TTL) depois de concluída, para que a
+consulta e as exportações o reaproveitem sem uma nova análise.
+"""
+import asyncio
+import time
+import uuid
+
+# Situações possíveis de uma tarefa
+PENDENTE = "pendente"
+PROCESSANDO = "processando"
+CONCLUIDA = "concluida"
+ERRO = "erro"
+
+
+class Tarefa:
+    """Estado de uma análise em segundo plano."""
+
+    def __init__(self, tipo: str):
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.status = PENDENTE
+        self.concluidos = 0
+        self.total = 0
+        self.resultado = None
+        self.erro = None
+        self.criada_em = time.time()
+        self.finalizada_em = None
+        self._execucao = None  # Mantém a referência à task do asyncio enquanto ela roda
+
+    def atualizar_progresso(self, concluidos: int, total: int):
+        self.concluidos, self.total = concluidos, total
+
+    def resumo(self) -> dict:
+        """Situação da tarefa para a resposta de consulta."""
+        return {
+            "tarefaId": self.id,
+            "tipo": self.tipo,
+            "status": self.status,
+            "progresso": {"concluidos": self.concluidos, "total": self.total},
+            "criadaEm": self.criada_em,
+            "finalizadaEm": self.finalizada_em,
+            "message": self.erro,
+        }
+
+
+class GerenciadorTarefas:
+    """Cria, executa e expira as tarefas de análise (usado apenas no event loop)."""
+
+    def __init__(self, ttl: float = 3600):
+        self.ttl = ttl
+        self._tarefas = {}
+
+    def criar(self, tipo: str, executar) -> Tarefa:
+        """Agenda `executar(tarefa)` (uma corrotina) em segundo plano e retorna a tarefa criada."""
+        self.expirar()
+        tarefa = Tarefa(tipo)
+        self._tarefas[tarefa.id] = tarefa
+        tarefa._execucao = asyncio.create_task(self._rodar(tarefa, executar))
+        return tarefa
+
+    def obter(self, tarefa_id: str):
+        """Retorna a tarefa, ou None se ela não existir ou já tiver expirado."""
+        self.expirar()
+        return self._tarefas.get(tarefa_id)
+
+    def expirar(self):
+        """Descarta as tarefas finalizadas há mais tempo que o TTL."""
+        limite = time.time() - self.ttl
+        for tarefa_id in [t.id for t in self._tarefas.values() if t.finalizada_em is not None and t.finalizada_em < limite]:
+            del self._tarefas[tarefa_id]
+
+    def cancelar_todas(self):
+        """Cancela as tarefas em andamento (encerramento do servidor)."""
+        for tarefa in self._tarefas.values():
+            if tarefa._execucao is not None and not tarefa._execucao.done():
+                tarefa._execucao.cancel()
+
+    async def _rodar(self, tarefa: Tarefa, executar):
+        tarefa.status = PROCESSANDO
+        try:
+            tarefa.resultado = await executar(tarefa)
+            tarefa.status = CONCLUIDA
+        except Exception as e:
+            tarefa.erro = str(e)
+            tarefa.status = ERRO
+            print(f"Erro na tarefa {tarefa.id}: {e}")
+        finally:
+            tarefa.finalizada_em = time.time()
+            tarefa._execucao = None
@@ -0,0 +1,99 @@
+"""Análise de um currículo: resposta JSON e resposta em fluxo (NDJSON) a partir do mesmo XML."""
+import json
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+import main
+from cache_resultados import CacheResultados
+from indices import MetricasPorAno, construir_indice_jcr, construir_indice_qualis, construir_indice_sjr
+from participantes import IndiceParticipantes, formatar_nome_autor
+from referencias import Referencias
+
+
+def montar_xml(artigos, nome="Fulano de Tal"):
+    """Currículo Lattes mínimo com os artigos informados como (título, ano, ISSN, autores)."""
+    registros = "".join(
+        f'<ARTIGO-PUBLICADO SEQUENCIA-PRODUCAO="{i}">'
+        f'<DADOS-BASICOS-DO-ARTIGO TITULO-DO-ARTIGO="{titulo}" ANO-DO-ARTIGO="{ano}" DOI="10.1/{i}"/>'
+        f'<DETALHAMENTO-DO-ARTIGO TITULO-DO-PERIODICO-OU-REVISTA="Revista {i}" ISSN="{issn}"/>'
+        + "".join(f'<AUTORES NOME-COMPLETO-DO-AUTOR="{autor}" NOME-PARA-CITACAO="" NRO-ID-CNPQ=""/>' for autor in autores)
+        + '</ARTIGO-PUBLICADO>'
+        for i, (titulo, ano, issn, autores) in enumerate(artigos)
+    )
+    return (
+        f'<CURRICULO-VITAE><DADOS-GERAIS NOME-COMPLETO="{nome}"/><PRODUCAO-BIBLIOGRAFICA>'
+        f'<ARTIGOS-PUBLICADOS>{registros}</ARTIGOS-PUBLICADOS></PRODUCAO-BIBLIOGRAFICA></CURRICULO-VITAE>'
+    ).encode("utf-8")
+
+ISSNS = ["12345678", "87654321", "11112222", "99990000"]
+ARTIGOS = [
+    (f"Artigo {i}", 2024 - (i * 7) % 9, ISSNS[i % len(ISSNS)], ["Ana Souza Lima", "Bruno Alves"][: 1 + i % 2])
+    for i in range(30)
+]
+
+
+@pytest.fixture
+def referencias():
+    pessoas = pd.DataFrame([
+        {"Nome Completo": nome, "Categoria": categoria, **formatar_nome_autor(nome)}
+        for nome, categoria in [("Ana Souza Lima", "DP"), ("Bruno Alves", "DISC")]
+    ])
+    jcr_df = pd.DataFrame({"ISSN": ["12345678", None], "eISSN": [None, "87654321"], "2022 JIF": [3.5, "<0.1"], "JIF Quartile": ["Q1", "Q4"]})
+    sjr_df = pd.DataFrame({"Issn": ["87654321, 11112222"], "SJR": ["0,512"], "SJR Best Quartile": ["Q2"]})
+    return Referencias(
+        versao="teste",
+        pasta="",
+        hashes=(),
+        hash_planilha_participantes=None,
+        indice_qualis=construir_indice_qualis(pd.DataFrame({"ISSN": ISSNS[:3], "Estrato": ["A1", "B2", "C"]})),
+        metricas_jcr=MetricasPorAno({2022: construir_indice_jcr(jcr_df)}),
+        metricas_sjr=MetricasPorAno({2023: construir_indice_sjr(sjr_df)}),
+        participantes=IndiceParticipantes(pessoas),
+    )
+
+def consumir(blocos):
+    """Retorna as linhas geradas e o valor final do gerador de blocos."""
+    linhas = []
+    while True:
+        try:
+            linhas.extend(json.loads(linha) for linha in next(blocos).splitlines())
+        except StopIteration as fim:
+            return linhas, fim.value
+
+
+def test_blocos_iguais_a_resposta_json(referencias):
+    xml = montar_xml(ARTIGOS)
+    resultado = main.analisar_curriculo(BytesIO(xml), referencias)
+    linhas, (campos, total) = consumir(main.analisar_curriculo_em_blocos(BytesIO(xml), referencias, tamanho_bloco=4))
+    assert main.montar_objeto_json(campos) == resultado
+    assert total == len(ARTIGOS)
+    assert linhas == json.loads(resultado)["artigos"]
+
+def test_artigos_na_ordem_do_xml(referencias):
+    resultado = json.loads(main.analisar_curriculo(BytesIO(montar_xml(ARTIGOS)), referencias))
+    assert [artigo["Título"] for artigo in resultado["artigos"]] == [titulo for titulo, *_ in ARTIGOS]
+
+@pytest.mark.parametrize("xml", [
+    montar_xml([("Sem ano", "", ISSNS[0], ["Ana Souza Lima"])]),
+    montar_xml(ARTIGOS)[:-40],  # XML truncado
+    montar_xml([]),
+])
+def test_xml_invalido_ou_sem_artigos(referencias, xml):
+    assert json.loads(main.analisar_curriculo(BytesIO(xml), referencias)) == main.SEM_ARTIGOS
+    linhas, (campos, total) = consumir(main.analisar_curriculo_em_blocos(BytesIO(xml), referencias, tamanho_bloco=4))
+    assert campos == main.SEM_ARTIGOS and total == 0
+
+def test_fluxo_guarda_o_resultado_e_repete_do_cache(referencias, monkeypatch):
+    monkeypatch.setattr(main, "cache_resultados", CacheResultados())
+    xml = montar_xml(ARTIGOS)
+
+    analisado, _ = consumir(main.transmitir_analise(xml, referencias, "chave"))
+    guardado = main.cache_resultados.obter("chave")
+    assert guardado == main.analisar_curriculo(BytesIO(xml), referencias)
+    assert analisado[-1]["resultadoId"] == "chave"
+    assert analisado[-1]["totalArtigos"] == len(ARTIGOS)
+
+    do_cache, _ = consumir(main.blocos_do_resultado(guardado, referencias.versao, "chave"))
+    assert do_cache == analisado
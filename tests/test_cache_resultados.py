@@ -0,0 +1,44 @@
+"""Cache de resultados: chaves por conteúdo e versão, LRU em memória e em disco."""
+import os
+
+from cache_resultados import CacheResultados, chave_resultado
+from referencias import calcular_versao
+
+
+def test_chave_depende_do_xml_e_da_versao():
+    chave = chave_resultado(b"<xml/>", "v1")
+    assert chave == chave_resultado(b"<xml/>", "v1")
+    assert chave != chave_resultado(b"<xml />", "v1")
+    assert chave != chave_resultado(b"<xml/>", "v2")
+
+def test_versao_muda_com_qualquer_arquivo_de_origem():
+    versao = calcular_versao(["qualis", "jcr", "sjr", "docentes"])
+    assert versao == calcular_versao(["qualis", "jcr", "sjr", "docentes"])
+    assert versao != calcular_versao(["qualis", "jcr", "sjr", "docentes alterado"])
+    assert versao != calcular_versao(["qualis", "jcr 2024", "sjr", "docentes"])
+
+def test_lru_em_memoria():
+    cache = CacheResultados(capacidade=2)
+    cache.guardar("a", b"1")
+    cache.guardar("b", b"2")
+    assert cache.obter("a") == b"1"  # "a" passa a ser o mais recente
+    cache.guardar("c", b"3")
+    assert cache.obter("b") is None
+    assert (cache.obter("a"), cache.obter("c")) == (b"1", b"3")
+    cache.limpar()
+    assert cache.obter("a") is None
+
+def test_nivel_em_disco(tmp_path):
+    cache = CacheResultados(capacidade=1, pasta=str(tmp_path), capacidade_disco=2)
+    for i, chave in enumerate("abc"):
+        cache.guardar(chave, chave.encode())
+        os.utime(tmp_path / f"{chave}.json", (i, i))  # Ordem de uso explícita, independente da resolução do relógio
+        if chave == "b":
+            cache.obter("a")  # Lido do disco: marcado como usado recentemente
+    assert sorted(os.listdir(tmp_path)) == ["a.json", "c.json"]
+
+    # Um novo processo (ou a memória esvaziada) continua encontrando os resultados no disco
+    cache.limpar()
+    assert CacheResultados(pasta=str(tmp_path)).obter("a") == b"a"
+    assert cache.obter("c") == b"c"
+    assert cache.obter("b") is None
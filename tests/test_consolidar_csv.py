@@ -0,0 +1,78 @@
+"""Consolidação dos CSVs de categoria do JCR (arquivos csv/consolidar_csv.py)."""
+import importlib.util
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from indices import construir_indice_jcr
+
+CAMINHO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'arquivos csv', 'consolidar_csv.py')
+
+
+@pytest.fixture(scope='module')
+def consolidar_csv():
+    spec = importlib.util.spec_from_file_location('consolidar_csv', CAMINHO)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def linha(nome, issn, eissn, categoria, quartil, jif='2.5'):
+    return [nome, nome[:4], 'Editora', issn, eissn, categoria, 'SCIE', '1,234', jif, quartil, '0.80', '12.5%']
+
+LINHAS = [
+    linha('Journal A', '1111-1111', '9999-9999', 'ENGINEERING, CIVIL', 'Q3'),
+    linha('Journal B', '2222-2222', 'N/A', 'GEOSCIENCES', 'Q1', jif='<0.1'),
+    linha('Journal A', '1111-1111', '9999-9999', 'WATER RESOURCES', 'Q2'),
+    linha('Journal C', 'N/A', '3333-3333', 'GEOSCIENCES', 'N/A'),
+    linha('Journal A', '1111-1111', '9999-9999', 'ENVIRONMENTAL SCIENCES', 'Q1'),
+    linha('Journal B', '2222-2222', 'N/A', 'GEOSCIENCES', 'Q1'),
+]
+
+
+def test_mesmo_quartil_do_indice_do_analisador(consolidar_csv):
+    consolidador = consolidar_csv.ConsolidadorJCR()
+    for campos in LINHAS:
+        consolidador.adicionar(list(campos))
+    colunas = consolidador.colunas(2023)
+
+    # Índice montado da tabela com uma linha por categoria e da tabela consolidada
+    por_categoria = pd.DataFrame([linha[:len(colunas) - 1] for linha in LINHAS], columns=colunas[:-1])
+    consolidada = pd.DataFrame(list(consolidador.linhas()), columns=colunas)
+    for tabela in (por_categoria, consolidada):
+        for coluna in ('ISSN', 'eISSN'):
+            tabela[coluna] = tabela[coluna].where(tabela[coluna] != 'N/A').str.replace('-', '')
+    quartis = construir_indice_jcr(por_categoria)['JIF Quartile']
+    assert construir_indice_jcr(consolidada)['JIF Quartile'].to_dict() == quartis.to_dict()
+    assert quartis.to_dict() == {'11111111': 'Q1', '99999999': 'Q1', '22222222': 'Q1', '33333333': 'N/A'}
+
+def test_primeira_linha_gravada_como_cabecalho(consolidar_csv):
+    # Primeira linha de dados transformada em cabeçalho pelo pandas: valores repetidos com '.1' e a coluna vazia 'Unnamed: 12'
+    texto = (
+        'Journal A,JA,Editora,1111-1111,1111-1111.1,ENGINEERING,SCIE,"1,234",0.80,Q3,0.80.1,12.5%,Unnamed: 12\n'
+        'Journal A,JA,Editora,1111-1111,1111-1111,WATER RESOURCES,SCIE,"1,234",0.80,Q2,0.80,12.5%,\n'
+        '\n'
+        'Journal B,JB,Editora,2222-2222,N/A,GEOSCIENCES,SCIE,10,1.5,Q4,0.30,N/A,\n'
+    )
+    linhas = list(consolidar_csv.ler_linhas_categoria(io.StringIO(texto)))
+    assert linhas[0] == ['Journal A', 'JA', 'Editora', '1111-1111', '1111-1111', 'ENGINEERING', 'SCIE', '1,234', '0.80', 'Q3', '0.80', '12.5%']
+    assert len(linhas) == 3 and all(len(campos) == len(consolidar_csv.COLUNAS_CATEGORIA) for campos in linhas)
+
+    # Com um cabeçalho de verdade, a primeira linha é descartada
+    cabecalho = ','.join(consolidar_csv.COLUNAS_CATEGORIA) + '\n'
+    assert list(consolidar_csv.ler_linhas_categoria(io.StringIO(cabecalho + texto.split('\n', 1)[1]))) == linhas[1:]
+
+def test_periodicos_unicos_com_as_categorias(consolidar_csv):
+    consolidador = consolidar_csv.ConsolidadorJCR()
+    for campos in LINHAS + [linha('Journal D', 'N/A', 'N/A', 'GEOSCIENCES', 'Q2'), linha('JOURNAL D ', '', '', 'HYDROLOGY', 'Q1')]:
+        consolidador.adicionar(list(campos))
+    linhas = list(consolidador.linhas())
+    assert consolidador.linhas_lidas == len(LINHAS) + 2
+    assert [linha[0] for linha in linhas] == ['Journal A', 'Journal B', 'Journal C', 'Journal D']
+    assert linhas[0][5] == 'ENGINEERING, CIVIL; WATER RESOURCES; ENVIRONMENTAL SCIENCES'
+    assert linhas[0][-1] == 'ENGINEERING, CIVIL: Q3; WATER RESOURCES: Q2; ENVIRONMENTAL SCIENCES: Q1'
+    assert linhas[1][5] == 'GEOSCIENCES'  # Categoria repetida não é contada duas vezes
+    assert (linhas[1][8], linhas[1][7]) == ('<0,1', 1234)
+    assert (linhas[2][3], linhas[2][4]) == (None, '3333-3333')
+    assert (linhas[3][5], linhas[3][9]) == ('GEOSCIENCES; HYDROLOGY', 'Q1')  # Sem ISSN: identificado pelo nome
@@ -0,0 +1,52 @@
+"""Exportação de resultados guardados, lidos sob demanda a partir do JSON."""
+import json
+
+import pytest
+
+from exportacao import gerar_csv, ler_resultado, nome_base_exportacao, tabela_artigos, tabela_pontuacao
+
+ARTIGOS = [
+    {"Título": f"Artigo {i} \"citado\", [v{i}]", "Ano": 2020 + i % 3, "ISSN": "1234-5678", "Qualis": "A1", "JIF": None, "DP": 1.5 * i}
+    for i in range(5)
+]
+PONTUACAO = [{"Ano": 2020, "A1": 1.0, "Total": 1.0}, {"Ano": 2021, "A1": 0.5, "Total": 0.5}]
+CURRICULO = {"nomePessoa": "Ana Souza Lima", "artigos": ARTIGOS, "pontuacaoQualis": PONTUACAO}
+LOTE = {
+    "curriculos": [
+        {"nomePessoa": "Ana", "artigos": ARTIGOS[:2], "pontuacaoQualis": PONTUACAO, "arquivo": "a.xml", "resultadoId": "x"},
+        {"message": "Nenhum artigo encontrado.", "arquivo": "b.xml"},
+        {"nomePessoa": "Bruno", "artigos": [], "pontuacaoQualis": [], "arquivo": "c.xml"},
+        {"nomePessoa": "Carla", "artigos": ARTIGOS[2:], "pontuacaoQualis": PONTUACAO, "arquivo": "d.xml"},
+    ],
+    "erros": [],
+    "totalArtigos": len(ARTIGOS),
+    "pontuacaoQualis": PONTUACAO,
+}
+
+
+def tabela(registros, inicio=()):
+    colunas = list(registros[0])
+    return colunas, [[*inicio, *(registro[coluna] for coluna in colunas)] for registro in registros]
+
+@pytest.mark.parametrize("indentacao", [None, 2])
+def test_curriculo(indentacao):
+    resultado = ler_resultado(json.dumps(CURRICULO, ensure_ascii=False, indent=indentacao).encode("utf-8"))
+    colunas, linhas = tabela_artigos(resultado)
+    assert (colunas, list(linhas)) == tabela(ARTIGOS)
+    colunas, linhas = tabela_pontuacao(resultado)
+    assert (colunas, list(linhas)) == tabela(PONTUACAO)
+    assert nome_base_exportacao(resultado, "abcdef123456") == "Ana Souza Lima_curriculo"
+
+@pytest.mark.parametrize("indentacao", [None, 2])
+def test_lote(indentacao):
+    resultado = ler_resultado(json.dumps(LOTE, indent=indentacao).encode("utf-8"))
+    colunas, linhas = tabela_artigos(resultado)
+    esperado = tabela(ARTIGOS[:2], ("a.xml", "Ana"))[1] + tabela(ARTIGOS[2:], ("d.xml", "Carla"))[1]
+    assert (colunas, list(linhas)) == (["Arquivo", "Nome"] + list(ARTIGOS[0]), esperado)
+    assert list(tabela_pontuacao(resultado)[1]) == tabela(PONTUACAO)[1]
+    assert nome_base_exportacao(resultado, "abcdef123456") == "lote_abcdef12"
+
+def test_resultado_sem_artigos():
+    assert ler_resultado(b'{"message":"Nenhum artigo encontrado.","resultadoId":"x"}') is None
+    resultado = ler_resultado(b'{"nomePessoa":"Ana","artigos":[],"pontuacaoQualis":[]}')
+    assert list(gerar_csv(*tabela_artigos(resultado))) == [b"\n"]
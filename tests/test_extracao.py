@@ -0,0 +1,43 @@
+"""Extração em fluxo (iterparse) dos registros do currículo Lattes."""
+import xml.etree.ElementTree as ET
+from io import BytesIO
+
+import main
+
+XML = (
+    '<CURRICULO-VITAE>'
+    '<DADOS-GERAIS NOME-COMPLETO="Ana Souza Lima"><ENDERECO><ENDERECO-PROFISSIONAL PAIS="Brasil"/></ENDERECO></DADOS-GERAIS>'
+    '<PRODUCAO-BIBLIOGRAFICA><ARTIGOS-PUBLICADOS>'
+    '<ARTIGO-PUBLICADO SEQUENCIA-PRODUCAO="1">'
+    '<DADOS-BASICOS-DO-ARTIGO TITULO-DO-ARTIGO="Primeiro" ANO-DO-ARTIGO="2021" DOI="10.1/1"/>'
+    '<DETALHAMENTO-DO-ARTIGO TITULO-DO-PERIODICO-OU-REVISTA="Revista A" ISSN="12345678"/>'
+    '<AUTORES NOME-COMPLETO-DO-AUTOR="Ana Souza Lima" NOME-PARA-CITACAO="LIMA, A. S." NRO-ID-CNPQ="123"/>'
+    '<AUTORES NOME-COMPLETO-DO-AUTOR="Bruno Alves" NOME-PARA-CITACAO="ALVES, B."/>'
+    '<PALAVRAS-CHAVE PALAVRA-CHAVE-1="teste"/>'
+    '</ARTIGO-PUBLICADO>'
+    '<ARTIGO-PUBLICADO SEQUENCIA-PRODUCAO="2">'
+    '<DADOS-BASICOS-DO-ARTIGO TITULO-DO-ARTIGO="Segundo" ANO-DO-ARTIGO="2019"/>'
+    '<DETALHAMENTO-DO-ARTIGO/>'
+    '<AUTORES NOME-COMPLETO-DO-AUTOR="Ana Souza Lima"/>'
+    '</ARTIGO-PUBLICADO>'
+    '</ARTIGOS-PUBLICADOS>'
+    '<TRABALHOS-EM-EVENTOS><TRABALHO-EM-EVENTOS><DADOS-BASICOS-DO-TRABALHO TITULO-DO-TRABALHO="Evento"/>'
+    '<AUTORES NOME-COMPLETO-DO-AUTOR="Carla Dias"/></TRABALHO-EM-EVENTOS></TRABALHOS-EM-EVENTOS>'
+    '</PRODUCAO-BIBLIOGRAFICA>'
+    '<DADOS-COMPLEMENTARES><PARTICIPACAO-EM-BANCA-TRABALHOS-CONCLUSAO/></DADOS-COMPLEMENTARES>'
+    '</CURRICULO-VITAE>'
+).encode("utf-8")
+
+
+def test_mesmos_registros_da_arvore_completa():
+    raiz = ET.parse(BytesIO(XML)).getroot()
+    esperado = [('DADOS-GERAIS', raiz.find('.//DADOS-GERAIS').get('NOME-COMPLETO'))]
+    esperado += [('ARTIGO-PUBLICADO', main.extrair_artigo(artigo)) for artigo in raiz.findall('.//ARTIGO-PUBLICADO')]
+    assert list(main.extrair_registros_lattes(BytesIO(XML))) == esperado
+
+def test_autores_e_valores_padrao():
+    artigos = [registro for tag, registro in main.extrair_registros_lattes(BytesIO(XML)) if tag == 'ARTIGO-PUBLICADO']
+    assert artigos[0]['Autores'] == 'Ana Souza Lima; Bruno Alves'
+    assert artigos[0][main.COLUNA_AUTORES_DETALHE][0] == {'nome': 'Ana Souza Lima', 'citacao': 'LIMA, A. S.', 'id_cnpq': '123'}
+    assert artigos[1]['DOI'] == 'Sem DOI'
+    assert artigos[1]['Título do Periódico'] == 'Sem Título do Periódico'
@@ -0,0 +1,67 @@
+"""Consulta dos índices de ISSN e das métricas por ano (JCR/SJR)."""
+import pandas as pd
+import pytest
+
+from datasets import Dataset, classificar_issns_dataset
+from indices import MetricasPorAno, construir_indice_jcr, normalizar_issns_consulta
+
+
+def indice_jcr(registros):
+    """Índice no formato do construir_indice_jcr a partir de {ISSN: (JIF, quartil)}."""
+    return pd.DataFrame(
+        [list(valores) for valores in registros.values()],
+        index=pd.Index(list(registros), name='ISSN'),
+        columns=['JIF', 'JIF Quartile'],
+    )
+
+
+@pytest.fixture
+def metricas():
+    return MetricasPorAno({
+        2019: indice_jcr({'11111111': ('1,00', 'Q4'), '22222222': ('2,00', 'Q3')}),
+        2021: indice_jcr({'11111111': ('1,50', 'Q3')}),
+        2023: indice_jcr({'11111111': ('3,00', 'Q1'), '33333333': ('0,50', 'Q2')}),
+    })
+
+
+def test_ano_mais_proximo(metricas):
+    chaves = normalizar_issns_consulta(['1111-1111', '1111-1111', '1111-1111', '1111-1111', '2222-2222', '3333-3333', '4444-4444'])
+    anos = pd.Series([2021, 2022, 2020, 2030, 2023, 2019, 2021])
+    resultado = metricas.consultar(chaves, anos)
+    assert resultado['Ano'].tolist() == [2021, 2021, 2019, 2023, 2019, 2023, '---']  # Empate (2020): o ano anterior
+    assert resultado['JIF'].tolist() == ['1,50', '1,50', '1,00', '3,00', '2,00', '0,50', '---']
+    assert resultado['JIF Quartile'].tolist() == ['Q3', 'Q3', 'Q4', 'Q1', 'Q3', 'Q2', '---']
+
+def test_sem_anos_usa_o_mais_recente(metricas):
+    chaves = normalizar_issns_consulta(['2222-2222', '1111-1111'])
+    resultado = metricas.consultar(chaves)
+    assert resultado['Ano'].tolist() == [2019, 2023]  # 2222-2222 só existe em 2019
+    assert resultado['JIF'].tolist() == ['2,00', '3,00']
+
+@pytest.mark.parametrize("anos", [None, pd.Series([], dtype='int64')])
+def test_consulta_vazia(metricas, anos):
+    resultado = metricas.consultar(normalizar_issns_consulta([]), anos)
+    assert resultado.empty
+    assert list(resultado.columns) == metricas.colunas + ['Ano']
+
+@pytest.mark.parametrize("metricas_dataset", [
+    MetricasPorAno({2023: indice_jcr({'11111111': ('3,00', 'Q1')})}),
+    MetricasPorAno({}),
+])
+def test_consulta_vazia_de_dataset(metricas_dataset):
+    dataset = Dataset(id='teste', tipo='jcr', arquivo='JCR.xlsx', tamanho=0, indice=metricas_dataset)
+    assert classificar_issns_dataset(dataset, []).empty
+    assert classificar_issns_dataset(dataset, ['1111-1111'])['ISSN'].tolist() == ['1111-1111']
+
+def test_indice_jcr_usa_o_melhor_quartil():
+    jcr_df = pd.DataFrame({
+        'ISSN': ['11111111', '11111111', None, '22222222', '33333333', '33333333'],
+        'eISSN': ['99999999', '99999999', '99999999', None, None, None],
+        '2023 JIF': [2.5, 2.5, 2.5, "<0.1", 1.0, 1.0],
+        'JIF Quartile': ['Q3', 'Q2', 'Q1', 'Q4', None, 'N/A'],
+    })
+    indice = construir_indice_jcr(jcr_df)
+    assert indice.loc['11111111'].tolist() == ['2,50', 'Q2']
+    assert indice.loc['99999999'].tolist() == ['2,50', 'Q1']  # eISSN também presente na terceira linha
+    assert indice.loc['22222222'].tolist() == ['<0.1', 'Q4']
+    assert indice.loc['33333333', 'JIF Quartile'] == 'N/A'  # Sem Q1-Q4: o primeiro valor informado
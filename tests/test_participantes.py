@@ -0,0 +1,153 @@
+"""Identificação de docentes/discentes: equivalência com a varredura antiga e alterações avulsas do cadastro."""
+import pandas as pd
+import pytest
+import unidecode
+
+from participantes import IndiceParticipantes, carregar_cadastro, formatar_nome_autor, normalizar_autor, salvar_cadastro
+
+
+def montar_cadastro(pessoas):
+    """Tabela no formato do docentes_discentes_formatados.xlsx a partir de (nome, categoria)."""
+    return pd.DataFrame([
+        {"Nome Completo": nome, "Categoria": categoria, **formatar_nome_autor(nome)}
+        for nome, categoria in pessoas
+    ])
+
+def categoria_antiga(autor, docentes_discentes_df):
+    """Varredura original: unidecode de cada variante de cada linha; vale a primeira linha que contém o autor."""
+    autor_normalizado = unidecode.unidecode(autor.strip().lower())
+    match = docentes_discentes_df[
+        (docentes_discentes_df['Nome Completo'].apply(lambda x: autor_normalizado in unidecode.unidecode(x.lower()))) |
+        (docentes_discentes_df['APA'].apply(lambda x: autor_normalizado in unidecode.unidecode(x.lower()))) |
+        (docentes_discentes_df['ABNT'].apply(lambda x: autor_normalizado in unidecode.unidecode(x.lower()))) |
+        (docentes_discentes_df['Custom'].apply(lambda x: autor_normalizado in unidecode.unidecode(x.lower())))
+    ]
+    return match.iloc[0]['Categoria'] if not match.empty else None
+
+def quantificar_antigo(autores, docentes_discentes_df):
+    contagem = {'DP': 0, 'DC': 0}
+    dis_count = 0
+    for autor in autores.split(';'):
+        categoria = categoria_antiga(autor, docentes_discentes_df)
+        if categoria in contagem:
+            contagem[categoria] += 1
+        elif categoria is not None:
+            dis_count += 1
+    return contagem['DP'], contagem['DC'], dis_count
+
+
+PESSOAS = [
+    ("Antônio Acácio de Melo Neto", "DP"),
+    ("Maria Silva Santos", "DC"),
+    ("Mariana Silva", "DISC"),
+    ("João Pedro Souza", "DISC"),
+    ("Fernanda Gonçalves", "DP"),
+]
+
+AUTORES = [
+    "Melo Neto", "MELO NETO, Antonio Acacio Melo", "A. A. M. Melo Neto", "antonio acacio",
+    "Silva", "SILVA SANTOS, Maria Silva", "Mariana", "Pedro Souza, J. P.", "joão pedro",
+    "Fernanda Goncalves", "GONÇALVES, Fernanda", "Ninguém Cadastrado", "  Souza  ", "s",
+]
+
+
+@pytest.fixture
+def cadastro():
+    return montar_cadastro(PESSOAS)
+
+
+def test_busca_por_substring_igual_a_varredura_antiga(cadastro):
+    indice = IndiceParticipantes(cadastro)
+    for autor in AUTORES:
+        posicao = indice.buscar(normalizar_autor(autor))
+        categoria = indice.categorias[posicao] if posicao is not None else None
+        assert categoria == categoria_antiga(autor, cadastro), autor
+
+def test_quantificar_igual_a_varredura_antiga(cadastro):
+    indice = IndiceParticipantes(cadastro)
+    for inicio in range(len(AUTORES)):
+        autores = ';'.join(AUTORES[inicio:inicio + 4])
+        assert indice.quantificar(autores) == quantificar_antigo(autores, cadastro), autores
+
+def test_primeira_linha_vence_na_busca_por_substring(cadastro):
+    indice = IndiceParticipantes(cadastro)
+    # "silva" aparece em Maria Silva Santos (DC) e em Mariana Silva (DISC): vale a primeira linha
+    assert indice.categoria("Silva") == "DC"
+    assert indice.categoria("Mariana") == "DISC"
+
+def test_nome_exato_compartilhado_e_ambiguo():
+    # As duas pessoas têm as mesmas variantes APA ("Souza Lima, A. S.") e Custom ("A. S. Souza Lima")
+    indice = IndiceParticipantes(montar_cadastro([("Ana Souza Lima", "DP"), ("Aline Souza Lima", "DISC")]))
+    citacao = {"nome": "Souza Lima, A. S.", "citacao": "SOUZA LIMA, Aline Souza"}
+    # A variante ambígua não decide; o nome de citação completo, sim
+    assert indice.categoria(citacao) == "DISC"
+    # Sem outra pista, a busca por substring devolve a primeira linha
+    assert indice.categoria({"nome": "Souza Lima, A. S."}) == "DP"
+
+def test_nome_exato_vence_substring_de_linha_anterior():
+    indice = IndiceParticipantes(montar_cadastro([("Ana Souza Lima", "DP"), ("Ana Souza", "DISC")]))
+    assert indice.categoria("Ana Souza") == "DISC"
+    assert indice.categoria("Ana Souza L") == "DP"
+
+def test_id_cnpq_vence_o_nome():
+    cadastro = montar_cadastro([("Ana Souza Lima", "DP"), ("Aline Souza Lima", "DISC")])
+    cadastro["ID CNPq"] = ["111", "222"]
+    indice = IndiceParticipantes(cadastro)
+    assert indice.categoria({"nome": "Ana Souza Lima", "id_cnpq": "222"}) == "DISC"
+
+def test_remover_mantem_as_posicoes_das_demais(cadastro):
+    indice = IndiceParticipantes(cadastro)
+    assert indice.remover("Maria Silva Santos") == 1
+    assert len(indice) == len(PESSOAS) - 1
+    assert indice.categoria("Maria Silva Santos") is None
+    # Sem a linha de Maria, "Silva" passa a ser a Mariana; as pessoas depois dela continuam corretas
+    assert indice.categoria("Silva") == "DISC"
+    assert indice.categoria("Pedro Souza, J. P.") == "DISC"
+    assert indice.categoria("Fernanda Goncalves") == "DP"
+    restantes = cadastro[cadastro["Nome Completo"] != "Maria Silva Santos"]
+    for autor in AUTORES:
+        assert indice.categoria(autor) == categoria_antiga(autor, restantes), autor
+
+def test_remover_desfaz_a_ambiguidade():
+    indice = IndiceParticipantes(montar_cadastro([("Ana Souza Lima", "DP"), ("Aline Souza Lima", "DISC")]))
+    indice.remover("Ana Souza Lima")
+    assert indice.categoria({"nome": "Souza Lima, A. S."}) == "DISC"
+
+def test_remover_e_adicionar_novamente(cadastro):
+    indice = IndiceParticipantes(cadastro)
+    indice.remover("Mariana Silva")
+    assert indice.categoria("Mariana") is None
+    posicao = indice.adicionar("Mariana Silva", "DC")
+    assert posicao == len(PESSOAS)
+    assert indice.categoria("Mariana") == "DC"
+    assert indice.categoria({"nome": "Silva, M."}) == "DC"
+    # A pessoa readicionada vai para o fim: "Silva" continua sendo a Maria (primeira linha)
+    assert indice.categoria("Silva") == "DC"
+    assert len(indice) == len(PESSOAS)
+    assert indice.tabela()["Nome Completo"].tolist()[-1] == "Mariana Silva"
+    with pytest.raises(ValueError):
+        indice.adicionar("mariana silva", "DISC")
+
+def test_adicionar_valida_a_categoria(cadastro):
+    with pytest.raises(ValueError):
+        IndiceParticipantes(cadastro).adicionar("Nova Pessoa", "XX")
+
+def test_copiar_nao_altera_o_original(cadastro):
+    indice = IndiceParticipantes(cadastro)
+    copia = indice.copiar()
+    copia.remover("Fernanda Gonçalves")
+    copia.adicionar("Nova Pessoa", "DP")
+    assert indice.categoria("Fernanda Goncalves") == "DP"
+    assert indice.categoria("Nova Pessoa") is None
+    assert copia.categoria("Nova Pessoa") == "DP"
+
+def test_cadastro_salvo_e_carregado(cadastro, tmp_path):
+    indice = IndiceParticipantes(cadastro)
+    indice.remover("João Pedro Souza")
+    caminho = str(tmp_path / "cadastro.pkl")
+    salvar_cadastro(indice, caminho, "hash-da-planilha")
+    carregado, hash_planilha = carregar_cadastro(caminho)
+    assert hash_planilha == "hash-da-planilha"
+    assert len(carregado) == len(PESSOAS) - 1
+    for autor in AUTORES:
+        assert carregado.categoria(autor) == indice.categoria(autor), autor
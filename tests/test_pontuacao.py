@@ -0,0 +1,57 @@
+"""Pontuação Qualis: a versão vetorizada deve reproduzir a tabela da versão original (iterrows por estrato)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from main import calcular_pontuacao_qualis
+
+
+def calcular_pontuacao_qualis_antiga(artigos_df):
+    """Versão original do main.py."""
+    pontuacao = {
+        "A1": 1.0, "A2": 0.9, "A3": 0.75, "A4": 0.6,
+        "B1": 0.4, "B2": 0.3, "B3": 0.15, "B4": 0.05,
+        "C": 0, "NP": 0
+    }
+
+    def calcular_pontos_por_qualis(qualis, dp):
+        return pontuacao.get(qualis, 0) / max(dp, 1)
+
+    def somar(x, estratos):
+        return sum(calcular_pontos_por_qualis(row['Qualis'], row['DP']) for _, row in x.iterrows() if row['Qualis'] in estratos)
+
+    pontuacao_anos = artigos_df.groupby('Ano')[['Qualis', 'DP']].apply(
+        lambda x: pd.Series({
+            **{estrato: somar(x, [estrato]) for estrato in pontuacao},
+            'Total A': somar(x, ['A1', 'A2', 'A3', 'A4']),
+            'Total B': somar(x, ['B1', 'B2', 'B3', 'B4']),
+        })
+    )
+
+    pontuacao_anos['Total'] = pontuacao_anos['Total A'] + pontuacao_anos['Total B']
+    pontuacao_anos['% A'] = (pontuacao_anos['Total A'] / pontuacao_anos['Total']) * 100 if pontuacao_anos['Total'].sum() > 0 else 0
+    pontuacao_anos['% B'] = (pontuacao_anos['Total B'] / pontuacao_anos['Total']) * 100 if pontuacao_anos['Total'].sum() > 0 else 0
+    return pontuacao_anos.reset_index()
+
+
+def artigos_aleatorios(semente, quantidade, estratos):
+    gerador = np.random.default_rng(semente)
+    return pd.DataFrame({
+        'Ano': gerador.integers(2017, 2025, quantidade),
+        'Qualis': gerador.choice(estratos, quantidade),
+        'DP': gerador.integers(0, 4, quantidade),
+    })
+
+
+@pytest.mark.parametrize("artigos_df", [
+    artigos_aleatorios(1, 200, ["A1", "A2", "A3", "A4", "B1", "B2", "B3", "B4", "C", "NP", "Sem Qualis"]),
+    artigos_aleatorios(2, 15, ["A1", "B4", "NP"]),
+    artigos_aleatorios(3, 30, ["C", "NP", "Sem Qualis"]),  # Total zero: percentuais 0
+    pd.DataFrame({'Ano': [2020, 2021], 'Qualis': ["A1", "C"], 'DP': [2, 1]}),  # Um ano só com C: percentual NaN
+    pd.DataFrame({'Ano': [2023], 'Qualis': ["B2"], 'DP': [0]}),
+])
+def test_pontuacao_igual_a_versao_original(artigos_df):
+    esperado = calcular_pontuacao_qualis_antiga(artigos_df)
+    obtido = calcular_pontuacao_qualis(artigos_df)
+    assert list(obtido.columns) == list(esperado.columns)
+    pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False, atol=1e-12)
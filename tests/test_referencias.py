@@ -0,0 +1,39 @@
+"""Carga do cadastro de docentes/discentes: cadastro compilado ou planilha."""
+import pickle
+
+import pandas as pd
+import pytest
+
+from participantes import ARQUIVO_CADASTRO, IndiceParticipantes, formatar_nome_autor, salvar_cadastro
+from referencias import ARQUIVO_DOCENTES_DISCENTES, carregar_participantes, hash_arquivo
+
+
+@pytest.fixture
+def pasta(tmp_path):
+    """Pasta de dados só com a planilha de docentes/discentes."""
+    pd.DataFrame([
+        {"Nome Completo": nome, "Categoria": categoria, **formatar_nome_autor(nome)}
+        for nome, categoria in [("Ana Souza Lima", "DP"), ("Bruno Alves", "DISC")]
+    ]).to_excel(tmp_path / ARQUIVO_DOCENTES_DISCENTES, index=False)
+    return tmp_path
+
+
+def test_cadastro_compilado_da_mesma_planilha(pasta):
+    participantes = IndiceParticipantes(pd.read_excel(pasta / ARQUIVO_DOCENTES_DISCENTES))
+    participantes.adicionar("Carla Dias", "DC")
+    salvar_cadastro(participantes, str(pasta / ARQUIVO_CADASTRO), hash_arquivo(pasta / ARQUIVO_DOCENTES_DISCENTES))
+    carregado, digest, _ = carregar_participantes(str(pasta), str(pasta / ".snapshots"))
+    assert carregado.categoria("Carla Dias") == "DC"
+    assert digest == hash_arquivo(pasta / ARQUIVO_CADASTRO)
+
+@pytest.mark.parametrize("conteudo", [
+    pickle.dumps({"versao": 1, "participantes": None, "planilha": None}),  # Formato antigo
+    b"nao e um pickle",
+    b"",
+])
+def test_cadastro_invalido_usa_a_planilha(pasta, conteudo):
+    (pasta / ARQUIVO_CADASTRO).write_bytes(conteudo)
+    participantes, digest, hash_planilha = carregar_participantes(str(pasta), str(pasta / ".snapshots"))
+    assert participantes.categoria("Ana Souza Lima") == "DP"
+    assert participantes.categoria("Bruno Alves") == "DISC"
+    assert digest == hash_planilha == hash_arquivo(pasta / ARQUIVO_DOCENTES_DISCENTES)
@@ -0,0 +1,57 @@
+"""Validação dos ZIPs enviados (tamanho, taxa de compressão e número de arquivos)."""
+import zipfile
+from io import BytesIO
+
+import pytest
+
+import main
+
+XML = b'<CURRICULO-VITAE><DADOS-GERAIS NOME-COMPLETO="Ana"/></CURRICULO-VITAE>'
+
+
+def montar_zip(membros, compressao=zipfile.ZIP_DEFLATED):
+    """ZIP em memória com os membros informados como {nome: bytes}."""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compressao) as zip_ref:
+        for nome, dados in membros.items():
+            zip_ref.writestr(nome, dados)
+    return buffer.getvalue()
+
+
+def test_zip_valido():
+    fluxo, mensagem = main.processar_zip(montar_zip({'curriculo.xml': XML}))
+    assert fluxo.read() == XML
+    assert mensagem == "Arquivo XML extraído com sucesso."
+
+@pytest.mark.parametrize("membros, mensagem", [
+    ({'curriculo.xml': b' ' * 10 ** 6}, "O arquivo curriculo.xml tem taxa de compressão suspeita."),
+    ({'leia-me.txt': b'texto', 'pasta/curriculo.xml': XML}, "Nenhum arquivo XML encontrado no ZIP."),
+    ({f'{i}.xml': XML for i in range(main.LIMITE_ARQUIVOS_ZIP + 1)}, "O arquivo ZIP contém arquivos demais."),
+])
+def test_zip_rejeitado(membros, mensagem):
+    assert main.processar_zip(montar_zip(membros)) == (None, mensagem)
+
+def test_limites_de_tamanho(monkeypatch):
+    conteudo = montar_zip({'curriculo.xml': XML}, zipfile.ZIP_STORED)
+    monkeypatch.setattr(main, "LIMITE_TAMANHO_ZIP", len(conteudo) - 1)
+    assert main.processar_zip(conteudo) == (None, "O arquivo ZIP excede o tamanho máximo permitido.")
+    monkeypatch.setattr(main, "LIMITE_TAMANHO_ZIP", len(conteudo))
+    monkeypatch.setattr(main, "LIMITE_TAMANHO_XML", len(XML) - 1)
+    assert main.processar_zip(conteudo) == (None, "O arquivo curriculo.xml excede o tamanho máximo permitido.")
+
+def test_lote_rejeita_apenas_os_membros_invalidos():
+    conteudo = montar_zip({
+        'a.xml': XML,
+        'bomba.xml': b' ' * 10 ** 6,
+        'interno.zip': montar_zip({'b.xml': XML}),
+        'leia-me.txt': b'texto',
+    })
+    curriculos, erros = main.listar_curriculos_lote('lote.zip', conteudo)
+    assert curriculos == [('lote.zip/a.xml', XML), ('lote.zip/interno.zip/b.xml', XML)]
+    assert erros == [{"arquivo": "lote.zip/bomba.xml", "message": "O arquivo bomba.xml tem taxa de compressão suspeita."}]
+
+def test_lote_respeita_o_tamanho_total():
+    conteudo = montar_zip({'a.xml': XML, 'b.xml': XML})
+    curriculos, erros = main.listar_curriculos_lote('lote.zip', conteudo, limite_restante=len(XML) + 1)
+    assert [nome for nome, _ in curriculos] == ['lote.zip/a.xml']
+    assert erros == [{"arquivo": "lote.zip/b.xml", "message": "O lote excede o tamanho máximo permitido."}]